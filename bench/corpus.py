@@ -0,0 +1,112 @@
+import os
+import random
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron who "
+    "sought dominion over middle earth and the free peoples elves dwarves "
+    "men hobbits wizards rivendell gondor rohan shire mordor isengard"
+).split()
+
+# Relative weights of the block kinds that make up a generated page.
+DEFAULT_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "unordered_list": 2,
+    "ordered_list": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+TEMPLATE = """<!doctype html>
+<html>
+    <head>
+        <meta charset="utf-8" />
+        <title>{{ Title }}</title>
+        <link href="/index.css" rel="stylesheet" />
+    </head>
+
+    <body>
+        <article>{{ Content }}</article>
+    </body>
+</html>
+"""
+
+PAGES_PER_DIR = 100
+
+class CorpusGenerator:
+    def __init__(self, seed=0, mix=None, blocks_per_page=(8, 24), inline_density=0.3):
+        self.random = random.Random(seed)
+        self.mix = mix or DEFAULT_MIX
+        self.kinds = list(self.mix)
+        self.weights = [self.mix[kind] for kind in self.kinds]
+        self.blocks_per_page = blocks_per_page
+        self.inline_density = inline_density
+
+    def words(self, low, high):
+        return " ".join(self.random.choice(WORDS) for _ in range(self.random.randint(low, high)))
+
+    def inline(self, low, high):
+        # Plain words with a controlled share of bold, italic, code, link and
+        # image spans mixed in.
+        parts = []
+        for _ in range(self.random.randint(low, high)):
+            word = self.random.choice(WORDS)
+            if self.random.random() >= self.inline_density:
+                parts.append(word)
+                continue
+            kind = self.random.randrange(5)
+            if kind == 0:
+                parts.append(f"**{word}**")
+            elif kind == 1:
+                parts.append(f"_{word}_")
+            elif kind == 2:
+                parts.append(f"`{word}`")
+            elif kind == 3:
+                parts.append(f"[{word}](/{word}/{self.random.randrange(1000)})")
+            else:
+                parts.append(f"![{word}](/images/{word}.png)")
+        return " ".join(parts)
+
+    def block(self, kind):
+        if kind == "heading":
+            return "#" * self.random.randint(2, 4) + " " + self.inline(2, 6)
+        if kind == "unordered_list":
+            return "\n".join(f"- {self.inline(3, 10)}" for _ in range(self.random.randint(2, 6)))
+        if kind == "ordered_list":
+            return "\n".join(f"{i}. {self.inline(3, 10)}" for i in range(1, self.random.randint(3, 7)))
+        if kind == "quote":
+            return "\n".join(f"> {self.inline(5, 15)}" for _ in range(self.random.randint(1, 4)))
+        if kind == "code":
+            lines = [f"    {self.words(2, 8)}" for _ in range(self.random.randint(2, 10))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        lines = [self.inline(8, 20) for _ in range(self.random.randint(1, 4))]
+        return "\n".join(lines)
+
+    def page(self):
+        blocks = [f"# {self.words(2, 6)}"]
+        for _ in range(self.random.randint(*self.blocks_per_page)):
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            blocks.append(self.block(kind))
+        return "\n\n".join(blocks) + "\n"
+
+    def asset(self, size):
+        return self.random.randbytes(size)
+
+def generate_corpus(root, pages, seed=0, mix=None, inline_density=0.3, assets=20, asset_size=64 * 1024):
+    generator = CorpusGenerator(seed, mix, inline_density=inline_density)
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    os.makedirs(os.path.join(static, "images"), exist_ok=True)
+    with open(os.path.join(root, "template.html"), "w") as file:
+        file.write(TEMPLATE)
+    with open(os.path.join(static, "index.css"), "w") as file:
+        file.write("body { font-family: serif; }\n")
+    for i in range(assets):
+        with open(os.path.join(static, "images", f"asset{i}.png"), "wb") as file:
+            file.write(generator.asset(asset_size))
+    for i in range(pages):
+        dir_path = os.path.join(content, f"section{i // PAGES_PER_DIR}", f"page{i}")
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, "index.md"), "w") as file:
+            file.write(generator.page())
+    return root
@@ -0,0 +1,206 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from blockcache import block_cache
+from block_markdown import BlockType, iter_blocks, markdown_to_blocks, markdown_to_html_node
+from copystatic import sync_static
+from gencontent import extract_title, find_pages
+from inline_markdown import text_to_textnodes
+from manifest import new_manifest
+from template import load_template
+
+from corpus import DEFAULT_MIX, generate_corpus
+
+import main as site
+
+STAGES = [
+    "markdown_to_blocks",
+    "text_to_textnodes",
+    "markdown_to_html_node",
+    "to_html",
+    "template",
+    "static_copy",
+    "build",
+    "build_cached",
+]
+
+def timed(func, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def inline_texts(documents):
+    texts = []
+    for markdown in documents:
+        for block_type, lines in iter_blocks(io.StringIO(markdown)):
+            if block_type == BlockType.PARAGRAPH:
+                texts.append(" ".join(lines))
+            elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+                texts.extend(line.split(" ", 1)[1] for line in lines)
+    return texts
+
+def run_size(root, pages, stages, repeat, seed, mix, inline_density):
+    generate_corpus(root, pages, seed, mix, inline_density)
+    content = os.path.join(root, "content")
+    template_path = os.path.join(root, "template.html")
+    documents = []
+    for from_path, _, _ in find_pages(content, os.path.join(root, "docs"), template_path):
+        with open(from_path) as file:
+            documents.append(file.read())
+    texts = inline_texts(documents)
+    nodes = [markdown_to_html_node(markdown) for markdown in documents]
+    bodies = [node.to_html() for node in nodes]
+    titles = [extract_title(markdown) for markdown in documents]
+    template = load_template(template_path, "/public/")
+
+    def static_copy():
+        dest = os.path.join(root, "static_copy")
+        shutil.rmtree(dest, ignore_errors=True)
+        sync_static(os.path.join(root, "static"), dest, new_manifest())
+
+    def build(*flags):
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            site.main(["/public/", *flags])
+        finally:
+            os.chdir(cwd)
+
+    stage_funcs = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(markdown) for markdown in documents],
+        "text_to_textnodes": lambda: [text_to_textnodes(text) for text in texts],
+        "markdown_to_html_node": lambda: [markdown_to_html_node(markdown) for markdown in documents],
+        "to_html": lambda: [node.to_html() for node in nodes],
+        "template": lambda: [template.render(Title=title, Content=body) for title, body in zip(titles, bodies)],
+        "static_copy": static_copy,
+        "build": lambda: build("--no-parse-cache"),
+        "build_cached": build,
+    }
+    # Every build starts with an empty in-memory block cache, as a fresh
+    # process would, so repeats do not time a cache the first run filled.
+    stage_setups = {
+        "build": block_cache.clear,
+        "build_cached": block_cache.clear,
+    }
+
+    results = []
+    for stage in stages:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if stage == "build_cached":
+                # Fill ./.cache/parse first so every timed run reads from it.
+                build()
+            samples = timed(stage_funcs[stage], repeat, stage_setups.get(stage))
+        result = {
+            "pages": pages,
+            "stage": stage,
+            "samples": samples,
+            "best": min(samples),
+            "median": statistics.median(samples),
+            "per_page_us": min(samples) / pages * 1e6,
+        }
+        results.append(result)
+        print(f"{pages:>7} pages  {stage:<22} best {result['best'] * 1000:9.2f} ms  {result['per_page_us']:9.1f} us/page")
+    return results
+
+def compare(results, baseline_path):
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    previous = {(result["pages"], result["stage"]): result for result in baseline["results"]}
+    print(f"\nCompared with {baseline_path} (best times, >1.00x is faster):")
+    for result in results:
+        old = previous.get((result["pages"], result["stage"]))
+        if old is None:
+            continue
+        print(f"{result['pages']:>7} pages  {result['stage']:<22} {old['best'] / result['best']:6.2f}x")
+
+def parse_mix(text):
+    # "paragraph=6,heading=2" -> {"paragraph": 6, "heading": 2}
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"unknown block kind {kind!r}, expected one of: {', '.join(DEFAULT_MIX)}")
+        if not weight.isdigit():
+            raise ValueError(f"weight for {kind!r} must be a whole number, got {weight!r}")
+        mix[kind] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("at least one block kind needs a weight above zero")
+    return mix
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of the site build on a synthetic corpus.")
+    parser.add_argument("--pages", default="10,100,1000", help="comma-separated corpus sizes (default: 10,100,1000)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus generator seed (default: 0)")
+    parser.add_argument(
+        "--mix",
+        default=",".join(f"{kind}={weight}" for kind, weight in DEFAULT_MIX.items()),
+        help="comma-separated KIND=WEIGHT block mix of generated pages (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--inline-density",
+        type=float,
+        default=0.3,
+        help="share of words wrapped in bold, italic, code, link or image markup (default: %(default)s)",
+    )
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+    args.pages = [int(pages) for pages in args.pages.split(",")]
+    args.stages = args.stages.split(",")
+    try:
+        args.mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(f"--mix: {e}")
+    if not 0 <= args.inline_density <= 1:
+        parser.error("--inline-density must be between 0 and 1")
+    for stage in args.stages:
+        if stage not in STAGES:
+            parser.error(f"unknown stage {stage!r}, expected one of: {', '.join(STAGES)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for pages in args.pages:
+        with tempfile.TemporaryDirectory() as root:
+            results.extend(run_size(root, pages, args.stages, args.repeat, args.seed, args.mix, args.inline_density))
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "mix": args.mix,
+            "inline_density": args.inline_density,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=1)
+    print(f"\nWrote {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+import io
 from enum import Enum
+from itertools import islice
 
-from htmlnode import ParentNode
+from htmlnode import ParentNode, RawNode
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
+from tracing import is_enabled, span
+
+READ_BATCH_LINES = 1024
 
 class BlockType(Enum):
     PARAGRAPH = 'paragraph'
@@ -13,34 +18,85 @@ class BlockType(Enum):
     ORDERED_LIST = 'ordered_list'
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
-            continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+    return ["\n".join(lines) for _, _, lines in iter_block_lines(io.StringIO(markdown))]
+
+
+def iter_block_lines(lines, first_line=1):
+    # Reads lines as they come from a text file and yields each block as a
+    # list of lines, with the same boundaries as splitting the whole document
+    # on "\n\n" and stripping each block: an empty line ends a block when the
+    # newline in front of it has not already been used as a separator. Each
+    # block comes with the source line and column it starts at, counting
+    # from first_line; its other lines are the source lines that follow.
+    piece = []
+    piece_line = first_line
+    line_number = first_line
+    newline_free = False
+    ends_with_newline = True
+    for line in lines:
+        ends_with_newline = line.endswith("\n")
+        if ends_with_newline:
+            line = line[:-1]
+        if line == "" and newline_free and ends_with_newline:
+            yield from _strip_block(piece, piece_line)
+            piece = []
+            piece_line = line_number + 1
+            newline_free = False
+        else:
+            piece.append(line)
+            newline_free = ends_with_newline
+        line_number += 1
+    if ends_with_newline:
+        piece.append("")
+    yield from _strip_block(piece, piece_line)
+
+
+def _strip_block(piece, piece_line):
+    if piece == [""] or not piece:
+        return
+    start = 0
+    end = len(piece)
+    while start < end and piece[start].strip() == "":
+        start += 1
+    while end > start and piece[end - 1].strip() == "":
+        end -= 1
+    if start == end:
+        yield piece_line, 1, [""]
+        return
+    lines = piece[start:end]
+    first = lines[0].lstrip()
+    column = len(lines[0]) - len(first) + 1
+    lines[0] = first
+    lines[-1] = lines[-1].rstrip()
+    yield piece_line + start, column, lines
+
+
+def iter_blocks(lines):
+    for _, _, block_lines in iter_block_lines(lines):
+        yield block_lines_to_block_type(block_lines), block_lines
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return block_lines_to_block_type(block.split("\n"))
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+
+def block_lines_to_block_type(lines):
+    first = lines[0]
+    if first.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
+    if first.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block.startswith("- "):
+    if first.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return BlockType.PARAGRAPH
         return BlockType.UNORDERED_LIST
-    if block.startswith("1. "):
+    if first.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
@@ -50,99 +106,198 @@ def block_to_block_type(block):
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown, cache=None, basepath="/", assets=None, minify=False):
+    return markdown_lines_to_html_node(io.StringIO(markdown), cache, basepath, assets, minify)
+
+
+def markdown_lines_to_html_node(lines, cache=None, basepath="/", assets=None, minify=False, first_line=1):
+    # Syntax errors give the line and column in the source, where the first
+    # of these lines is line first_line.
+    if is_enabled():
+        lines = traced_lines(lines)
+    blocks = iter_block_lines(lines, first_line)
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    while True:
+        with span("block parse"):
+            block = next(blocks, None)
+            if block is None:
+                break
+            line_number, column, block_lines = block
+            block_type = block_lines_to_block_type(block_lines)
+        origin = (line_number, column)
+        if cache is None:
+            html_node = block_lines_to_html_node(block_type, block_lines, basepath, assets, origin)
+        else:
+            html_node = cached_block_to_html_node(block_type, block_lines, cache, basepath, assets, minify, origin)
         children.append(html_node)
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def traced_lines(lines):
+    # Reads lines in batches, each traced as a read, so reading the body is
+    # timed apart from splitting it into blocks.
+    lines = iter(lines)
+    while True:
+        with span("read"):
+            batch = list(islice(lines, READ_BATCH_LINES))
+        if not batch:
+            return
+        yield from batch
+
+
+def cached_block_to_html_node(block_type, lines, cache, basepath="/", assets=None, minify=False, origin=(1, 1)):
+    # The rendered markup only depends on the block text, on how its links
+    # are rewritten and on whether it is minified, so repeated blocks are
+    # rendered once and reused as raw HTML.
+    text = "\n".join(lines)
+    # A block whose source is already over the entry limit would not be
+    # stored, so it is not serialized up front either.
+    if not cache.fits(len(text)):
+        return block_lines_to_html_node(block_type, lines, basepath, assets, origin)
+    key = (basepath, assets, minify, text)
+    with span("block cache"):
+        html = cache.get(key)
+    if html is None:
+        node = block_lines_to_html_node(block_type, lines, basepath, assets, origin)
+        with span("serialize"):
+            html = node.to_html(minify)
+        cache.put(key, html)
+    return RawNode(html)
+
+
+def block_to_html_node(block, basepath="/", assets=None):
+    lines = block.split("\n")
+    return block_lines_to_html_node(block_lines_to_block_type(lines), lines, basepath, assets)
+
+
+def block_lines_to_html_node(block_type, lines, basepath="/", assets=None, origin=(1, 1)):
+    # origin is the source (line, column) of the block's first character,
+    # which syntax errors are reported against.
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(lines, basepath, assets, origin)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return heading_to_html_node(lines, basepath, assets, origin)
     if block_type == BlockType.CODE:
-        return code_to_html_node(block)
+        return code_to_html_node(lines)
     if block_type == BlockType.ORDERED_LIST:
-        return olist_to_html_node(block)
+        return olist_to_html_node(lines, basepath, assets, origin)
     if block_type == BlockType.UNORDERED_LIST:
-        return ulist_to_html_node(block)
+        return ulist_to_html_node(lines, basepath, assets, origin)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(lines, basepath, assets, origin)
     raise ValueError("invalid block type")
 
 
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+def text_to_children(text, basepath="/", assets=None, origin=None):
+    # Parsing the inline markdown and building the HTML nodes from it are
+    # timed apart when tracing.
+    with span("inline parse"):
+        text_nodes = text_to_textnodes(text, origin)
+    with span("html build"):
+        return textnodes_to_children(text_nodes, basepath, assets)
+
+
+def joined_origin(pieces, columns, line):
+    # The origin of text joined from pieces with one separator character,
+    # where piece i starts at columns[i] of source line line + i.
+    origin = []
+    offset = 0
+    for i, piece in enumerate(pieces):
+        origin.append((offset, line + i, columns[i]))
+        offset += len(piece) + 1
+    return origin
+
+
+def paragraph_to_html_node(lines, basepath="/", assets=None, origin=(1, 1)):
+    line, column = origin
+    columns = [column] + [1] * (len(lines) - 1)
+    children = text_to_children(" ".join(lines), basepath, assets, joined_origin(lines, columns, line))
+    return ParentNode("p", children)
+
+
+def heading_to_html_node(lines, basepath="/", assets=None, origin=(1, 1)):
+    line, column = origin
+    text = heading_text(lines)
+    pieces = text.split("\n")
+    columns = [column + len(lines[0]) - len(pieces[0])] + [1] * (len(lines) - 1)
+    children = text_to_children(text, basepath, assets, joined_origin(pieces, columns, line))
+    return ParentNode(f"h{heading_level(lines)}", children)
+
+
+def code_to_html_node(lines):
+    with span("html build"):
+        child = text_node_to_html_node(TextNode(code_text(lines), TextType.TEXT))
+        code = ParentNode("code", [child])
+        return ParentNode("pre", [code])
+
+
+def olist_to_html_node(lines, basepath="/", assets=None, origin=(1, 1)):
+    return ParentNode("ol", list_items(lines, 3, basepath, assets, origin))
+
+
+def ulist_to_html_node(lines, basepath="/", assets=None, origin=(1, 1)):
+    return ParentNode("ul", list_items(lines, 2, basepath, assets, origin))
+
+
+def list_items(lines, marker_length, basepath="/", assets=None, origin=(1, 1)):
+    line, column = origin
+    html_items = []
+    for i, item in enumerate(lines):
+        item_origin = [(0, line + i, (column if i == 0 else 1) + marker_length)]
+        children = text_to_children(item[marker_length:], basepath, assets, item_origin)
+        html_items.append(ParentNode("li", children))
+    return html_items
+
+
+def quote_to_html_node(lines, basepath="/", assets=None, origin=(1, 1)):
+    line, column = origin
+    pieces, starts = quote_lines(lines)
+    columns = [column + starts[0]] + [1 + start for start in starts[1:]]
+    children = text_to_children(" ".join(pieces), basepath, assets, joined_origin(pieces, columns, line))
+    return ParentNode("blockquote", children)
+
+
+def textnodes_to_children(text_nodes, basepath="/", assets=None):
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, basepath, assets)
         children.append(html_node)
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
-    return ParentNode("p", children)
-
-
-def heading_to_html_node(block):
+def heading_level(lines):
     level = 0
-    for char in block:
+    for char in lines[0]:
         if char == "#":
             level += 1
         else:
             break
+    return level
+
+
+def heading_text(lines):
+    block = "\n".join(lines)
+    level = heading_level(lines)
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
-    text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    return block[level + 1 :]
 
 
-def code_to_html_node(block):
+def code_text(lines):
+    block = "\n".join(lines)
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
-    text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
-    return ParentNode("pre", [code])
-
-
-def olist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[3:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ol", html_items)
-
+    return block[4:-3]
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[2:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ul", html_items)
 
-
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_lines(lines):
+    # The text of each quote line and where it starts in the line.
     new_lines = []
+    starts = []
     for line in lines:
         if not line.startswith(">"):
             raise ValueError("invalid quote block")
-        new_lines.append(line.lstrip(">").strip())
-    content = " ".join(new_lines)
-    children = text_to_children(content)
-    return ParentNode("blockquote", children)
+        text = line.lstrip(">").lstrip()
+        new_lines.append(text.rstrip())
+        starts.append(len(line) - len(text))
+    return new_lines, starts
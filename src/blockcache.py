@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 4096
+# The shared block cache keeps at most this much rendered HTML, counted in
+# characters, and never holds a single block larger than the entry limit:
+# such blocks are rarely repeated, and keeping them would pin large parts of
+# big pages after they are written.
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_ENTRY_BYTES = 16 * 1024
+
+class BlockCache:
+    # Bounded LRU cache of rendered HTML fragments keyed by block text, for
+    # blocks that repeat across pages (disclaimers, navigation, snippets).
+    # Besides the entry count it can be bounded by the total length of the
+    # cached strings, max_bytes, and refuse strings over max_entry_bytes.
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, max_bytes=None, max_entry_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def fits(self, size):
+        return self.maxsize > 0 and (self.max_entry_bytes is None or size <= self.max_entry_bytes)
+
+    def size(self, html):
+        return 0 if self.max_bytes is None else len(html)
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return html
+
+    def put(self, key, html):
+        if not self.fits(len(html)):
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= self.size(old)
+        self.entries[key] = html
+        self.bytes += self.size(html)
+        while len(self.entries) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= self.size(old)
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return (
+            f"BlockCache(size={len(self.entries)}, maxsize={self.maxsize}, bytes={self.bytes}, "
+            f"max_bytes={self.max_bytes}, hits={self.hits}, misses={self.misses})"
+        )
+
+block_cache = BlockCache(max_bytes=DEFAULT_MAX_BYTES, max_entry_bytes=DEFAULT_MAX_ENTRY_BYTES)
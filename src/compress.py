@@ -0,0 +1,88 @@
+import contextlib
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file, prune_output
+from tracing import span
+from walker import walk
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+SIDECAR_EXTENSIONS = (".gz", ".br")
+
+def sidecar_extensions():
+    if brotli is None:
+        return (".gz",)
+    return SIDECAR_EXTENSIONS
+
+def find_compressible_files(dest_folder):
+    return [entry for _, entry in walk(dest_folder, ignore=()) if entry.name.endswith(COMPRESSIBLE_EXTENSIONS)]
+
+def compress_file(path):
+    with span("compress", "compress", path=path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        # A fixed mtime keeps the .gz bytes stable between builds.
+        write_sidecar(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            write_sidecar(path + ".br", brotli.compress(data))
+        else:
+            # A .br left by a build that had brotli would no longer match.
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path + ".br")
+
+def write_sidecar(path, data):
+    with open(path, 'wb') as file:
+        file.write(data)
+
+def sidecars_exist(path):
+    return all(os.path.exists(path + ext) for ext in sidecar_extensions())
+
+def compress_outputs(dest_folder, manifest, workers=None):
+    # Writes .gz (and .br when brotli is installed) next to every text output
+    # whose bytes changed since it was last compressed. The compressors
+    # release the GIL, so a thread pool runs them in parallel. Each output is
+    # recorded as [digest, mtime_ns, size] and only hashed again once its
+    # stat changes, so a rebuild that rewrote a few pages does not read every
+    # file in the folder.
+    old_hashes = manifest.get("compressed", {})
+    new_hashes = {}
+    stale = []
+    for entry in find_compressible_files(dest_folder):
+        path = entry.path
+        stat = entry.stat()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        old = old_hashes.get(path)
+        if isinstance(old, list) and old[1:] == stamp:
+            digest = old[0]
+        else:
+            digest = hash_file(path)
+        new_hashes[path] = [digest, *stamp]
+        if not isinstance(old, list) or old[0] != digest or not sidecars_exist(path):
+            stale.append(path)
+
+    if stale:
+        print(f"Compressing {len(stale)} file(s)...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() surfaces the first error from the workers.
+            list(executor.map(compress_file, stale))
+
+    for path in old_hashes:
+        if path not in new_hashes:
+            prune_sidecars(path, dest_folder)
+    manifest["compressed"] = new_hashes
+    return stale
+
+def prune_sidecars(path, dest_folder):
+    for ext in SIDECAR_EXTENSIONS:
+        if os.path.exists(path + ext):
+            prune_output(path + ext, dest_folder)
+
+def remove_compressed_outputs(dest_folder, manifest):
+    for path in manifest.pop("compressed", {}):
+        prune_sidecars(path, dest_folder)
@@ -1,15 +1,58 @@
 import os
 import shutil
 
+from manifest import hash_file, prune_output
+from tracing import span
+from walker import walk
+
 def copy_file_recursive(src_folder, dest_folder):
-    if not os.path.exists(dest_folder):
-        os.mkdir(dest_folder)
+    os.makedirs(dest_folder, exist_ok=True)
+    for rel_path, entry in walk(src_folder, dirs=True):
+        dest_path = os.path.join(dest_folder, rel_path)
+        print(f" * {entry.path} -> {dest_path}")
+        if entry.is_dir():
+            os.makedirs(dest_path, exist_ok=True)
+        else:
+            shutil.copy2(entry.path, dest_path)
+
+def iter_static_files(src_folder, dest_folder):
+    # Yields (src_path, dest_path, entry); the entry carries the source's
+    # cached stat.
+    for rel_path, entry in walk(src_folder):
+        yield entry.path, os.path.join(dest_folder, rel_path), entry
 
-    for filename in os.listdir(src_folder):
-        src_path = os.path.join(src_folder, filename)
-        dest_path = os.path.join(dest_folder, filename)
+def file_unchanged(src_path, dest_path, checksum=False, src_stat=None):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if src_stat is None:
+        src_stat = os.stat(src_path)
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(src_path) == hash_file(dest_path)
+    # copy2 carries the modification time over, so a matching mtime means
+    # the destination is the copy we made last time.
+    return src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+def sync_static(src_folder, dest_folder, manifest, checksum=False, assets=None):
+    # With an asset map, files are copied under their fingerprinted names.
+    old_files = manifest.get("static", {})
+    new_files = {}
+    for src_path, dest_path, entry in iter_static_files(src_folder, dest_folder):
+        if assets is not None:
+            dest_path = os.path.join(dest_folder, assets.files[src_path])
+        new_files[dest_path] = src_path
+        if file_unchanged(src_path, dest_path, checksum, entry.stat()):
+            continue
         print(f" * {src_path} -> {dest_path}")
-        if os.path.isfile(src_path):
+        with span("copy", "static", path=src_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
             shutil.copy2(src_path, dest_path)
-        else:
-            copy_file_recursive(src_path, dest_path)
+
+    for dest_path in old_files:
+        if dest_path not in new_files:
+            print(f" * removing {dest_path}")
+            prune_output(dest_path, dest_folder)
+    manifest["static"] = new_files
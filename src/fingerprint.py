@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import re
+
+from copystatic import iter_static_files
+from manifest import hash_file
+
+HASH_LENGTH = 10
+ASSET_MANIFEST_FILENAME = "asset-manifest.json"
+
+_URL_ATTR_RE = re.compile(r'\b(href|src)="([^"]*)"')
+
+def load_hash_cache(path):
+    try:
+        with open(path, 'r') as file:
+            hash_cache = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if not isinstance(hash_cache, dict):
+        return {}
+    return hash_cache
+
+def cached_hash(path, hash_cache, stat=None):
+    # Entries are [mtime_ns, size, sha256], so a file is only read again
+    # when its stat changes.
+    if stat is None:
+        stat = os.stat(path)
+    stamp = [stat.st_mtime_ns, stat.st_size]
+    cached = hash_cache.get(path)
+    if cached is not None and cached[:2] == stamp:
+        return cached[2]
+    digest = hash_file(path)
+    hash_cache[path] = stamp + [digest]
+    return digest
+
+def fingerprint_name(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+class AssetMap:
+    # Maps site-absolute asset URLs ("/images/a.png") to their fingerprinted
+    # URLs, and static source files to their fingerprinted output paths.
+    def __init__(self, entries, files):
+        self.entries = entries
+        self.files = files
+        self.urls = {url: entry["path"] for url, entry in entries.items()}
+        self.key = hashlib.sha256(json.dumps(self.urls, sort_keys=True).encode()).hexdigest()
+
+    def get(self, url, default=None):
+        return self.urls.get(url, default)
+
+    def rewrite_html(self, html):
+        def replace(match):
+            url = self.urls.get(match.group(2))
+            if url is None:
+                return match.group(0)
+            return f'{match.group(1)}="{url}"'
+        return _URL_ATTR_RE.sub(replace, html)
+
+    def __eq__(self, other):
+        return isinstance(other, AssetMap) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __repr__(self):
+        return f"AssetMap(assets={len(self.urls)}, key={self.key[:HASH_LENGTH]})"
+
+def fingerprint_static(src_folder, hash_cache):
+    entries = {}
+    files = {}
+    for src_path, rel_path, entry in iter_static_files(src_folder, ""):
+        stat = entry.stat()
+        digest = cached_hash(src_path, hash_cache, stat)
+        hashed_path = fingerprint_name(rel_path, digest)
+        url = "/" + rel_path.replace(os.sep, "/")
+        entries[url] = {
+            "path": "/" + hashed_path.replace(os.sep, "/"),
+            "etag": f'"{digest}"',
+            "size": stat.st_size,
+        }
+        files[src_path] = hashed_path
+    # Only keep hashes of files that still exist.
+    for path in list(hash_cache):
+        if path not in files:
+            del hash_cache[path]
+    return AssetMap(entries, files)
+
+def write_asset_manifest(path, assets):
+    with open(path, 'w') as file:
+        json.dump(assets.entries, file, indent=1, sort_keys=True)
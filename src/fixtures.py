@@ -0,0 +1,25 @@
+import os
+import tempfile
+import unittest
+
+class TempDirTestCase(unittest.TestCase):
+    # Shared scaffold for tests that build a site in a throwaway directory.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.tick = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+        # Make every write visible to mtime checks regardless of resolution.
+        self.tick += 10**9
+        os.utime(path, ns=(self.tick, self.tick))
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
@@ -1,46 +1,278 @@
-import re
+import io
 import os
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from itertools import chain, islice
 from pathlib import Path
-from block_markdown import markdown_to_html_node
+import tracing
+from blockcache import block_cache
+from block_markdown import markdown_lines_to_html_node
+from htmlnode import escape_text
+from manifest import hash_file, prune_output
+from metadata import TITLE_RE, body_first_line, read_header, read_front_matter
+from output import OutputWriter, make_dirs, write_file
+from parsecache import PARSER_VERSION
+from template import TEMPLATE_FILENAME, find_template, load_template
+from tracing import span
+from walker import walk
 
-def generate_page(from_path, template_path, to_path, BASEPATH):
+PAGES_IN_FLIGHT_PER_JOB = 4
+
+def generate_page(
+    from_path, template_path, to_path, BASEPATH, writer=None, assets=None, minify=False, parse_cache=None
+):
+    # Without a writer the page is written right away, creating its
+    # directory; a writer expects the directory to exist already. Either way
+    # the chunks of the page are handed over as they are serialized.
     print(f" * {from_path} {template_path} -> {to_path}")
-    from_file = open(from_path, 'r')
-    markdown_content = from_file.read()
-    from_file.close()
+    with span("page", "page", path=from_path):
+        page = iter_page(from_path, template_path, BASEPATH, assets, minify, parse_cache)
+        # A pooled writer writes on its own threads, traced there as "write";
+        # written inline, the page is serialized as it is written, so the
+        # write time is part of this span.
+        with span("serialize"):
+            if writer is None:
+                make_dirs([to_path])
+                write_file(to_path, page)
+            else:
+                writer.write(to_path, page)
+
+def iter_page(from_path, template_path, BASEPATH, assets=None, minify=False, parse_cache=None):
+    # Returns the page as an iterable of chunks. The body is parsed up front
+    # and serialized as the chunks are consumed; a cached body is streamed
+    # from disk, and a freshly rendered one is cached as it streams by.
+    with span("template"):
+        template = load_template(template_path, BASEPATH, assets, minify)
+    if parse_cache is None:
+        title, node = parse_page(from_path, BASEPATH, assets, minify)
+        return template.iter_render(Title=escape_text(title), Content=node.iter_html(minify))
+
+    key = parse_cache.key(hash_file(from_path), BASEPATH, assets, minify)
+    with span("parse cache"):
+        cached = parse_cache.open_entry(key)
+    if cached is None:
+        title, node = parse_page(from_path, BASEPATH, assets, minify)
+        cached = title, parse_cache.iter_put(key, title, node.iter_html(minify))
+    title, chunks = cached
+    return template.iter_render(Title=escape_text(title), Content=chunks)
+
+def render_page(from_path, template_path, BASEPATH, assets=None, minify=False, parse_cache=None):
+    return "".join(iter_page(from_path, template_path, BASEPATH, assets, minify, parse_cache))
 
-    template_file = open(template_path, 'r')
-    template_content = template_file.read()
-    template_file.close()
+def parse_page(from_path, BASEPATH, assets=None, minify=False):
+    # The title usually sits on the first lines, so read the header with a
+    # short scan and then parse the body block by block without reading the
+    # file whole.
+    with open(from_path, 'r') as from_file:
+        return parse_stream(from_file, BASEPATH, assets, minify)
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+def parse_stream(stream, BASEPATH="/", assets=None, minify=False):
+    with span("read header"):
+        start = stream.tell()
+        title = read_header(stream)["title"]
+        first_line = body_first_line(stream, start)
+    return title, markdown_lines_to_html_node(stream, block_cache, BASEPATH, assets, minify, first_line)
 
-    title = extract_title(markdown_content)
-    template = template_content.replace('{{ Title }}', title)
-    template = template.replace('{{ Content }}', html)
-    template = template.replace('href="/', f'href="{BASEPATH}')
-    template = template.replace('src="/', f'src="{BASEPATH}')
+def render_document(markdown, template_path=None, BASEPATH="/", assets=None, minify=False):
+    # Renders markdown held in memory: the full page when a template is
+    # given, otherwise just the body, which then needs no title. Front
+    # matter is skipped either way.
+    stream = io.StringIO(markdown)
+    if template_path is None:
+        read_front_matter(stream)
+        first_line = body_first_line(stream, 0)
+        return markdown_lines_to_html_node(stream, block_cache, BASEPATH, assets, minify, first_line).to_html(minify)
+    title, node = parse_stream(stream, BASEPATH, assets, minify)
+    template = load_template(template_path, BASEPATH, assets, minify)
+    return template.render(Title=escape_text(title), Content=node.to_html(minify))
 
-    dest_dir_path = os.path.dirname(to_path)
-    if not os.path.exists(dest_dir_path):
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(to_path, 'w')
-    to_file.write(template)
+def render_many(documents, template_path=None, BASEPATH="/", jobs=1, assets=None, minify=False):
+    # Yields (name, html) for each (name, markdown) in documents, in order
+    # and as they are consumed. The block and template caches carry over
+    # from one document to the next, in each worker process when jobs > 1,
+    # where at most a few documents per worker are in flight. An error
+    # rendering a document is raised when its turn comes.
+    if jobs <= 1:
+        for name, markdown in documents:
+            yield name, render_document(markdown, template_path, BASEPATH, assets, minify)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for name, markdown in documents:
+            if len(pending) >= jobs * PAGES_IN_FLIGHT_PER_JOB:
+                done_name, future = pending.popleft()
+                yield done_name, future.result()
+            future = executor.submit(render_document, markdown, template_path, BASEPATH, assets, minify)
+            pending.append((name, future))
+        while pending:
+            name, future = pending.popleft()
+            yield name, future.result()
+
+def generate_page_worker(
+    from_path, template_path, to_path, BASEPATH, trace=False, assets=None, minify=False, parse_cache=None
+):
+    # Runs in a worker process; a forked worker inherits the parent's
+    # recorded events, so start from a clean slate. Worker processes already
+    # overlap their writes, so each writes its page directly.
+    tracing.disable()
+    if trace:
+        tracing.enable()
+    generate_page(
+        from_path, template_path, to_path, BASEPATH, OutputWriter(workers=0), assets, minify, parse_cache
+    )
+    return tracing.disable()
 
 def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, BASEPATH):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, BASEPATH)
-        else:
-            generate_pages_recursive(from_path, template_path, dest_path, BASEPATH)
+    generate_pages(iter_pages(dir_path_content, dest_dir_path, template_path), BASEPATH)
+
+def find_pages(dir_path_content, dest_dir_path, template_path):
+    return list(iter_pages(dir_path_content, dest_dir_path, template_path))
+
+def iter_pages(dir_path_content, dest_dir_path, template_path):
+    # A template.html inside a content directory overrides the template for
+    # that directory and everything below it.
+    templates = {"": find_template(dir_path_content, template_path)}
+    for rel_path, entry in walk(dir_path_content, dirs=True):
+        parent_template = templates[os.path.dirname(rel_path)]
+        if entry.is_dir():
+            templates[rel_path] = find_template(entry.path, parent_template)
+            continue
+        if entry.name == TEMPLATE_FILENAME or not entry.name.endswith(".md"):
+            continue
+        dest_path = str(Path(dest_dir_path, rel_path).with_suffix(".html"))
+        yield entry.path, parent_template, dest_path
+
+def find_page(from_path, dir_path_content, dest_dir_path, template_path):
+    rel_path = os.path.relpath(from_path, dir_path_content)
+    parts = Path(rel_path).parts
+    dir_path = dir_path_content
+    template_path = find_template(dir_path, template_path)
+    for part in parts[:-1]:
+        dir_path = os.path.join(dir_path, part)
+        template_path = find_template(dir_path, template_path)
+    dest_path = str(Path(os.path.join(dest_dir_path, *parts)).with_suffix(".html"))
+    return os.path.join(dir_path, parts[-1]), template_path, dest_path
+
+def page_entry(from_path, template_path, BASEPATH, template_hash=None, assets=None, minify=False):
+    if template_hash is None:
+        template_hash = hash_file(template_path)
+    entry = {
+        "source": from_path,
+        "source_hash": hash_file(from_path),
+        "template": template_path,
+        "template_hash": template_hash,
+        "basepath": BASEPATH,
+        "renderer": PARSER_VERSION,
+    }
+    if assets is not None:
+        entry["assets"] = assets.key
+    if minify:
+        entry["minify"] = True
+    return entry
+
+def generate_pages(pages, BASEPATH, jobs=1, assets=None, minify=False, parse_cache=None):
+    # pages may be any iterable of (from_path, template_path, to_path), such
+    # as iter_pages; it is consumed lazily, and in parallel mode at most a
+    # few pages per worker are queued at a time. Each output directory is
+    # created once, the first time a page needs it.
+    errors = []
+    made_dirs = set()
+    pages = iter(pages)
+    head = list(islice(pages, 2))
+    pages = chain(head, pages)
+    if jobs <= 1 or len(head) <= 1:
+        sources = {}
+        with OutputWriter() as writer:
+            for from_path, template_path, to_path in pages:
+                make_dirs([to_path], made_dirs)
+                sources[to_path] = from_path
+                try:
+                    generate_page(
+                        from_path, template_path, to_path, BASEPATH, writer, assets, minify, parse_cache
+                    )
+                except Exception as e:
+                    errors.append((from_path, to_path, f"{type(e).__name__}: {e}"))
+            for to_path, message in writer.close():
+                errors.append((sources[to_path], to_path, message))
+        errors.sort()
+        return errors
+
+    def collect(future):
+        from_path, to_path = futures.pop(future)
+        try:
+            tracing.add_events(future.result())
+        except Exception as e:
+            errors.append((from_path, to_path, f"{type(e).__name__}: {e}"))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for from_path, template_path, to_path in pages:
+            if len(futures) >= jobs * PAGES_IN_FLIGHT_PER_JOB:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            make_dirs([to_path], made_dirs)
+            future = executor.submit(
+                generate_page_worker,
+                from_path,
+                template_path,
+                to_path,
+                BASEPATH,
+                tracing.is_enabled(),
+                assets,
+                minify,
+                parse_cache,
+            )
+            futures[future] = (from_path, to_path)
+        for future in as_completed(list(futures)):
+            collect(future)
+    errors.sort()
+    return errors
+
+def generate_pages_incremental(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    BASEPATH,
+    manifest,
+    jobs=1,
+    assets=None,
+    minify=False,
+    parse_cache=None,
+):
+    template_hashes = {}
+    old_pages = manifest.get("pages", {})
+    new_pages = {}
+    stale_pages = []
+    for from_path, page_template_path, dest_path in find_pages(dir_path_content, dest_dir_path, template_path):
+        if page_template_path not in template_hashes:
+            template_hashes[page_template_path] = hash_file(page_template_path)
+        entry = page_entry(
+            from_path, page_template_path, BASEPATH, template_hashes[page_template_path], assets, minify
+        )
+        new_pages[dest_path] = entry
+        if old_pages.get(dest_path) == entry and os.path.exists(dest_path):
+            continue
+        stale_pages.append((from_path, page_template_path, dest_path))
+
+    errors = generate_pages(stale_pages, BASEPATH, jobs, assets, minify, parse_cache)
+    # Failed pages stay out of the manifest so the next build retries them,
+    # but their previous output is left alone.
+    failed = {dest_path for _, dest_path, _ in errors}
+    for dest_path in failed:
+        del new_pages[dest_path]
+
+    for dest_path in old_pages:
+        if dest_path not in new_pages and dest_path not in failed:
+            print(f" * removing {dest_path}")
+            prune_output(dest_path, dest_dir_path)
+    manifest["pages"] = new_pages
+    return errors
 
 def extract_title(markdown):
-    title = re.search(r'^#\s+(.+)$', markdown, re.MULTILINE)
+    title = TITLE_RE.search(markdown)
     if not title:
         raise ValueError("No title found")
     return title.group(1)
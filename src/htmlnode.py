@@ -1,51 +1,158 @@
+import re
+import sys
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("shared empty value is read-only, pass your own list or dict instead")
+
+class _EmptyChildren(list):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+class _EmptyProps(dict):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+# Shared, immutable defaults: nodes without children or props point at these
+# instead of allocating an empty list or dict each.
+EMPTY_CHILDREN = _EmptyChildren()
+EMPTY_PROPS = _EmptyProps()
+
+# Interned tag table: maps each tag to its canonical string and the
+# precomputed markup used when serializing it.
+_TAGS = {}
+
+def tag_markup(tag):
+    markup = _TAGS.get(tag)
+    if markup is None:
+        tag = sys.intern(tag)
+        markup = _TAGS[tag] = (tag, f"<{tag}", f"<{tag}>", f"</{tag}>")
+    return markup
+
+# Text under these tags keeps its whitespace when minifying.
+PRESERVE_WHITESPACE_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+
+# Only ASCII whitespace collapses in HTML; a non-breaking space must stay.
+_WHITESPACE_RE = re.compile(r"[ \t\n\r\f]+")
+
+def collapse_whitespace(text):
+    return _WHITESPACE_RE.sub(" ", text)
+
+# Most text has nothing to escape, and checking for the few special
+# characters is far cheaper than building a new string. When there is
+# something to escape, chained replace() beats str.translate, which goes
+# through a Python-level mapping for each character.
+def escape_text(text):
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+def escape_attribute(value):
+    if '"' in value or "&" in value or "<" in value or ">" in value:
+        value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        return value.replace('"', "&quot;")
+    return value
+
 class HTMLNode:
-    def __init__(self, tag=None, value=None, children=[], props={}):
-        self.tag = tag
+    __slots__ = ("tag", "value", "children", "props")
+
+    def __init__(self, tag=None, value=None, children=EMPTY_CHILDREN, props=EMPTY_PROPS):
+        self.tag = tag if tag is None else tag_markup(tag)[0]
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, minify=False):
         raise NotImplementedError("to_html method is not implemented")
 
+    def iter_html(self, minify=False):
+        yield self.to_html(minify)
+
     def props_to_html(self):
-        props_html = ""
-        if self.props:
-            for key, value in self.props.items():
-                props_html += f' {key}="{value}"'
-        return props_html
+        if not self.props:
+            return ""
+        return "".join(f' {key}="{escape_attribute(value)}"' for key, value in self.props.items())
 
     def __repr__(self):
         return f"HTMLNode(tag='{self.tag}', value='{self.value}', children={self.children}, props={self.props})"
 
 class LeafNode(HTMLNode):
-    def __init__(self, tag, value, props={}):
+    __slots__ = ()
+
+    def __init__(self, tag, value, props=EMPTY_PROPS):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def to_html(self, minify=False):
         if self.value is None:
             raise ValueError("All leaf nodes must have a value")
+        value = escape_text(self.value)
+        if minify and self.tag not in PRESERVE_WHITESPACE_TAGS:
+            value = collapse_whitespace(value)
         if self.tag is None:
-            return self.value
+            return value
+        _, open_prefix, open_tag, close_tag = tag_markup(self.tag)
+        if self.props:
+            open_tag = f"{open_prefix}{self.props_to_html()}>"
         if self.tag == "img":
-            return f"<{self.tag}{self.props_to_html()} />"
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return f"{open_tag[:-1]} />"
+        return f"{open_tag}{value}{close_tag}"
 
     def __repr__(self):
         return f"LeafNode(tag='{self.tag}', value='{self.value}', props={self.props})"
 
 class ParentNode(HTMLNode):
-    def __init__(self, tag, children, props={}):
+    __slots__ = ()
+
+    def __init__(self, tag, children, props=EMPTY_PROPS):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, minify=False):
+        return "".join(self.iter_html(minify))
+
+    def iter_html(self, minify=False):
+        # Walk the tree with an explicit stack of child iterators so chunks
+        # can be written out as they are produced, without building the
+        # markup of every subtree as an intermediate string. When minifying,
+        # whitespace is collapsed everywhere except below a pre or code tag.
+        yield self.open_tag()
+        collapse = minify and self.tag not in PRESERVE_WHITESPACE_TAGS
+        stack = [(self, iter(self.children), collapse)]
+        while stack:
+            node, children, collapse = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    yield child.open_tag()
+                    child_collapse = collapse and child.tag not in PRESERVE_WHITESPACE_TAGS
+                    stack.append((child, iter(child.children), child_collapse))
+                    break
+                yield from child.iter_html(collapse)
+            else:
+                stack.pop()
+                yield tag_markup(node.tag)[3]
+
+    def open_tag(self):
         if self.tag is None:
             raise ValueError("Tag cannot be None")
         if self.children is None:
             raise ValueError("Children cannot be None")
-
-        inner_html = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{self.props_to_html()}>{inner_html}</{self.tag}>"
+        _, open_prefix, open_tag, _ = tag_markup(self.tag)
+        if self.props:
+            return f"{open_prefix}{self.props_to_html()}>"
+        return open_tag
 
     def __repr__(self):
         return f"ParentNode(tag='{self.tag}', children={self.children}, props={self.props})"
+
+class RawNode(HTMLNode):
+    # Already rendered and escaped markup, emitted as is.
+    __slots__ = ()
+
+    def __init__(self, html):
+        super().__init__(None, html, None, None)
+
+    def to_html(self, minify=False):
+        return self.value
+
+    def __repr__(self):
+        return f"RawNode(html='{self.value}')"
@@ -1,65 +1,229 @@
+import bisect
+import math
 import re
 from htmlnode import LeafNode
 from textnode import TextNode, TextType
 
+_DELIMITER_RE = re.compile(r"`|_|\*\*")
+
+_DELIMITER_TYPES = {"`": TextType.CODE, "_": TextType.ITALIC, "**": TextType.BOLD}
+# Code spans are split out first, then italics, then bold, so a span has to
+# close before any delimiter of a type that is split out ahead of it.
+_DELIMITER_CLOSERS = {"`": ("`",), "_": ("_", "`"), "**": ("**", "_", "`")}
+
+class MarkdownSyntaxError(ValueError):
+    def __init__(self, message, line, column):
+        super().__init__(message, line, column)
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        return f"{self.args[0]} at line {self.line}, column {self.column}"
+
+def syntax_error(message, text, position, origin=None):
+    # Without an origin the position is given within text itself. An origin
+    # places text in its source file as (offset, line, column) entries in
+    # offset order: from each offset on, text follows the source line from
+    # that column.
+    if origin is not None:
+        offset, line, column = origin[bisect.bisect_right(origin, (position, math.inf)) - 1]
+        return MarkdownSyntaxError(message, line, column + position - offset)
+    line = text.count("\n", 0, position) + 1
+    column = position - (text.rfind("\n", 0, position) + 1) + 1
+    return MarkdownSyntaxError(message, line, column)
+
+# The split_nodes_* passes work on each node's span of its source string
+# and emit spans of that same string, so chaining them copies no text until
+# a node's text is read.
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        split_node = []
-        section = old_node.text.split(delimiter)
-        if len(section) % 2 == 0:
+        source, start, end = old_node.source, old_node.start, old_node.end
+        # The sections str.split(delimiter) would return, as offsets.
+        bounds = [start]
+        position = source.find(delimiter, start, end)
+        while position != -1:
+            bounds.append(position)
+            bounds.append(position + len(delimiter))
+            position = source.find(delimiter, position + len(delimiter), end)
+        bounds.append(end)
+        if len(bounds) % 4 == 0:
             raise ValueError("invalid markdown, formatted section not closed")
-        for i in range(len(section)):
-            if section[i] == "":
+        for i in range(0, len(bounds), 2):
+            section_start, section_end = bounds[i], bounds[i + 1]
+            if section_start == section_end:
                 continue
-            if i % 2 == 0:
-                split_node.append(TextNode(section[i], TextType.TEXT))
-            else:
-                split_node.append(TextNode(section[i], text_type))
-        new_nodes.extend(split_node)
+            section_type = TextType.TEXT if i % 4 == 0 else text_type
+            new_nodes.append(TextNode.span(source, section_start, section_end, section_type))
     return new_nodes
 
-def text_to_textnodes(text):
-    node = TextNode(text, TextType.TEXT)
-    nodes = split_nodes_delimiter([node], "`", TextType.CODE)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-
+def text_to_textnodes(text, origin=None):
+    nodes = []
+    tokens = [(match.start(), match.group()) for match in _DELIMITER_RE.finditer(text)]
+    plain_start = 0
+    i = 0
+    while i < len(tokens):
+        start, delimiter = tokens[i]
+        closers = _DELIMITER_CLOSERS[delimiter]
+        j = i + 1
+        while j < len(tokens) and tokens[j][1] not in closers:
+            j += 1
+        if j == len(tokens) or tokens[j][1] != delimiter:
+            raise syntax_error("invalid markdown, formatted section not closed", text, start, origin)
+        end = tokens[j][0]
+        split_text_images_and_links(text, plain_start, start, nodes, origin)
+        if end > start + len(delimiter):
+            nodes.append(TextNode.span(text, start + len(delimiter), end, _DELIMITER_TYPES[delimiter]))
+        plain_start = end + len(delimiter)
+        i = j + 1
+    split_text_images_and_links(text, plain_start, len(text), nodes, origin)
     return nodes
 
+# Images and links are found with str.find jumps instead of regexes. Each
+# search resumes from a cached result that only ever moves forward, so a
+# fragment is scanned in linear time no matter how its brackets are nested
+# or left open. The matching rules are those of the patterns
+#   images:        !\[([^\]]*)\]\(([^)]*)\)
+#   link checks:    \[([^\]]*)\]\(([^)]*)\)
+#   links:    (?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)
+# The same walk finds the first opener outside those spans that is left
+# unclosed: no "]" follows it, or its "](" is never followed by a ")".
+# Both scanners return (spans, unclosed), with -1 when nothing is unclosed.
+
+def find_bracket_spans(text, opener, start=0, end=None):
+    if end is None:
+        end = len(text)
+    spans = []
+    position = start
+    close_bracket = -1
+    close_paren = -1
+    while True:
+        open_at = text.find(opener, position, end)
+        if open_at == -1:
+            return spans, -1
+        body = open_at + len(opener)
+        if close_bracket < body:
+            close_bracket = text.find("]", body, end)
+            if close_bracket == -1:
+                return spans, open_at
+        if text.startswith("(", close_bracket + 1, end):
+            if close_paren < close_bracket + 2:
+                close_paren = text.find(")", close_bracket + 2, end)
+                if close_paren == -1:
+                    return spans, open_at
+            spans.append((open_at, close_bracket, close_paren + 1))
+            position = close_paren + 1
+        else:
+            position = open_at + 1
+
+def find_link_spans(text, start=0, end=None):
+    # Runs the "[" walk of find_bracket_spans for the unclosed check along
+    # with the link walk, sharing their searches: each walk skips the
+    # openers inside its own spans, which resume from link_from and
+    # check_from.
+    if end is None:
+        end = len(text)
+    links = []
+    position = start
+    link_from = start
+    check_from = start
+    next_open = -1
+    close_bracket = -1
+    open_paren = -1
+    close_paren = -1
+    while True:
+        open_at = text.find("[", position, end)
+        if open_at == -1:
+            return links, -1
+        position = open_at + 1
+        if close_bracket <= open_at:
+            close_bracket = text.find("]", open_at + 1, end)
+            if close_bracket == -1:
+                return links, text.find("[", max(open_at, check_from), end)
+        if not text.startswith("(", close_bracket + 1, end):
+            continue
+        url_start = close_bracket + 2
+        if close_paren < url_start:
+            close_paren = text.find(")", url_start, end)
+            if close_paren == -1:
+                # Marks that no ")" is left, so the search is not repeated.
+                close_paren = end
+        if close_paren == end:
+            if open_at >= check_from:
+                return links, open_at
+            # No link can close from here on, but the check goes on past
+            # the bracket span this opener is in.
+            link_from = end
+        else:
+            if open_at >= check_from:
+                check_from = close_paren + 1
+            if open_at >= link_from and not (open_at > start and text[open_at - 1] == "!"):
+                if next_open <= open_at:
+                    next_open = text.find("[", open_at + 1, end)
+                if open_paren < url_start:
+                    open_paren = text.find("(", url_start, end)
+                if (next_open == -1 or next_open > close_bracket) and (open_paren == -1 or open_paren > close_paren):
+                    links.append((open_at, close_bracket, close_paren + 1))
+                    link_from = close_paren + 1
+        position = max(position, min(link_from, check_from))
+
+def split_text_images_and_links(text, start, end, new_nodes, origin=None):
+    if start >= end:
+        return
+    images, unclosed = find_bracket_spans(text, "![", start, end)
+    if unclosed != -1:
+        raise syntax_error("Invalid markdown: unclosed image element", text, unclosed, origin)
+    position = start
+    for image_start, close_bracket, image_end in images:
+        split_text_links(text, position, image_start, new_nodes, origin)
+        new_nodes.append(TextNode.span(text, image_start + 2, close_bracket, TextType.IMAGE, text[close_bracket + 2:image_end - 1]))
+        position = image_end
+    split_text_links(text, position, end, new_nodes, origin)
+
+def split_text_links(text, start, end, new_nodes, origin=None):
+    if start >= end:
+        return
+    links, unclosed = find_link_spans(text, start, end)
+    if unclosed != -1:
+        raise syntax_error("Invalid markdown: link not properly closed", text, unclosed, origin)
+    position = start
+    for link_start, close_bracket, link_end in links:
+        if link_start > position:
+            new_nodes.append(TextNode.span(text, position, link_start, TextType.TEXT))
+        new_nodes.append(TextNode.span(text, link_start + 1, close_bracket, TextType.LINK, text[close_bracket + 2:link_end - 1]))
+        position = link_end
+    if position < end:
+        new_nodes.append(TextNode.span(text, position, end, TextType.TEXT))
+
 def split_nodes_image(old_nodes):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        check_for_unclosed_images(original_text)
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
+        source, start, end = old_node.source, old_node.start, old_node.end
+        images, unclosed = find_bracket_spans(source, "![", start, end)
+        if unclosed != -1:
+            raise syntax_error("Invalid markdown: unclosed image element", old_node.text, unclosed - start)
+        if not images:
             new_nodes.append(old_node)
             continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+        position = start
+        for image_start, close_bracket, image_end in images:
+            if image_start > position:
+                new_nodes.append(TextNode.span(source, position, image_start, TextType.TEXT))
             new_nodes.append(
-                TextNode(
-                    image[0],
-                    TextType.IMAGE,
-                    image[1],
+                TextNode.span(
+                    source, image_start + 2, close_bracket, TextType.IMAGE, source[close_bracket + 2:image_end - 1]
                 )
             )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+            position = image_end
+        if position < end:
+            new_nodes.append(TextNode.span(source, position, end, TextType.TEXT))
     return new_nodes
 
 def split_nodes_link(old_nodes):
@@ -68,70 +232,45 @@ def split_nodes_link(old_nodes):
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        check_for_unclosed_links(original_text)
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        source, start, end = old_node.source, old_node.start, old_node.end
+        links, unclosed = find_link_spans(source, start, end)
+        if unclosed != -1:
+            raise syntax_error("Invalid markdown: link not properly closed", old_node.text, unclosed - start)
+        if not links:
             new_nodes.append(old_node)
             continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        position = start
+        for link_start, close_bracket, link_end in links:
+            if link_start > position:
+                new_nodes.append(TextNode.span(source, position, link_start, TextType.TEXT))
+            new_nodes.append(
+                TextNode.span(source, link_start + 1, close_bracket, TextType.LINK, source[close_bracket + 2:link_end - 1])
+            )
+            position = link_end
+        if position < end:
+            new_nodes.append(TextNode.span(source, position, end, TextType.TEXT))
     return new_nodes
 
 def extract_markdown_images(text):
-    regex = r'!\[([^\]]*)\]\(([^)]*)\)'
-    matches = re.findall(regex, text)
-    return matches
+    return [
+        (text[start + 2:close_bracket], text[close_bracket + 2:end - 1])
+        for start, close_bracket, end in find_bracket_spans(text, "![")[0]
+    ]
 
 def extract_markdown_links(text):
-    regex = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(regex, text)
-    return matches
-
-def check_for_unclosed_links(text):
-    # First, look for properly formatted links
-    proper_links_pattern = r'\[([^\]]*)\]\(([^)]*)\)'
-
-    # Then, look for patterns that started like a link but weren't properly closed
-    unclosed_patterns = [
-        r'\[([^\]]*)\]\([^)]*$',     # Unclosed URL parenthesis
-        r'\[([^\]]*)\($',            # Started URL but no closing parenthesis
-        r'\[([^\]]*)$',              # Unclosed text bracket
+    return [
+        (text[start + 1:close_bracket], text[close_bracket + 2:end - 1])
+        for start, close_bracket, end in find_link_spans(text)[0]
     ]
 
-    # Remove all properly formatted links from the text
-    cleaned_text = re.sub(proper_links_pattern, '', text)
-
-    # Check if any unclosed patterns remain
-    for pattern in unclosed_patterns:
-        if re.search(pattern, cleaned_text):
-            raise ValueError(f"Invalid markdown: link not properly closed. Found unclosed pattern matching: {pattern}")
-
+def check_for_unclosed_links(text):
+    _, unclosed = find_bracket_spans(text, "[")
+    if unclosed != -1:
+        raise syntax_error("Invalid markdown: link not properly closed", text, unclosed)
     return True
 
 def check_for_unclosed_images(text):
-    # Pattern for properly formatted images
-    proper_image_pattern = r'!\[([^\]]*)\]\(([^)]*)\)'
-
-    # Remove all properly formatted images from the text
-    cleaned_text = re.sub(proper_image_pattern, '', text)
-
-    # Patterns for unclosed image elements
-    unclosed_image_patterns = [
-        r'!\[([^\]]*)\]\([^)]*$',     # Unclosed URL parenthesis in image
-        r'!\[([^\]]*)\($',            # Started URL but no closing parenthesis in image
-        r'!\[([^\]]*)$',              # Unclosed alt text bracket in image
-    ]
-
-    # Check if any unclosed image patterns remain
-    for pattern in unclosed_image_patterns:
-        if re.search(pattern, cleaned_text):
-            raise ValueError("Invalid markdown: unclosed image element found")
-
+    _, unclosed = find_bracket_spans(text, "![")
+    if unclosed != -1:
+        raise syntax_error("Invalid markdown: unclosed image element", text, unclosed)
     return True
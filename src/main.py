@@ -1,29 +1,244 @@
+import argparse
 import os
-from posixpath import basename
 import shutil
 import sys
 
-from copystatic import copy_file_recursive
-from gencontent import generate_page, generate_pages_recursive
+import tracing
+import walker
+from blockcache import block_cache
+from compress import compress_outputs, remove_compressed_outputs
+from copystatic import sync_static
+from fingerprint import ASSET_MANIFEST_FILENAME, fingerprint_static, load_hash_cache, write_asset_manifest
+from gencontent import generate_pages_incremental
+from manifest import load_manifest, new_manifest, prune_output, save_manifest
+from metadata import LISTING_FILENAME, prune_listings, write_listings
+from parsecache import DEFAULT_MAX_BYTES, ParseCache
+from serve import DEFAULT_PORT, PreviewSite, serve
+from watch import Watcher
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
+dir_path_cache = "./.cache"
 template_path = "./template.html"
+manifest_path = os.path.join(dir_path_cache, "manifest.json")
+hash_cache_path = os.path.join(dir_path_cache, "hashes.json")
+parse_cache_path = os.path.join(dir_path_cache, "parse")
 default_basepath = "/"
 
-def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site from ./content and ./static into ./docs.")
+    parser.add_argument("basepath", nargs="?", default=default_basepath)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep ./docs and only re-render pages and re-copy assets whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash instead of modification time",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="render pages in N worker processes (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--no-parse-cache",
+        dest="parse_cache",
+        action="store_false",
+        help="render every page body from scratch instead of reusing bodies cached in ./.cache/parse",
+    )
+    parser.add_argument(
+        "--parse-cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        metavar="MB",
+        help="evict the least recently used cached page bodies beyond this size (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="skip files and directories whose name matches this glob in ./content and ./static, "
+        f"on top of {', '.join(walker.DEFAULT_IGNORE)} (repeatable)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, keep watching ./content, ./static and the template and rebuild what changes",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="instead of building, serve a preview that renders pages from ./content on request "
+        "and assets from ./static, writing nothing to ./docs",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="port for --serve (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help=f"copy static files under content-hashed names, rewrite references to them "
+        f"and write ./docs/{ASSET_MANIFEST_FILENAME}",
+    )
+    parser.add_argument(
+        "--listing",
+        action="append",
+        default=[],
+        metavar="SECTION",
+        help=f"write ./docs/SECTION/{LISTING_FILENAME} with the title, URL and front matter of every page "
+        f"under ./content/SECTION, read without rendering (repeatable)",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip insignificant whitespace and comments from the template and collapse it in page text",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed .gz (and .br, if brotli is installed) files next to each text output",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="record timed spans per page and stage to PATH in Chrome trace-event format",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive number")
+    if args.parse_cache_size < 0:
+        parser.error("--parse-cache-size must be zero or a positive number")
+    if args.fingerprint and args.watch:
+        parser.error("--fingerprint cannot be combined with --watch")
+    if args.serve:
+        for flag in ("incremental", "watch", "fingerprint", "compress", "trace"):
+            if getattr(args, flag):
+                parser.error(f"--serve cannot be combined with --{flag}")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
 
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+def main(argv=None):
+    args = parse_args(argv)
+    basepath = args.basepath
+    walker.set_ignore_patterns(walker.DEFAULT_IGNORE + tuple(args.ignore))
+    if args.trace:
+        tracing.enable()
+
+    parse_cache = None
+    if args.parse_cache:
+        parse_cache = ParseCache(parse_cache_path, args.parse_cache_size * 1024 * 1024)
+
+    if args.serve:
+        site = PreviewSite(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            basepath,
+            minify=args.minify,
+            listings=args.listing,
+            parse_cache=parse_cache,
+        )
+        serve(site, port=args.port)
+        if parse_cache is not None:
+            parse_cache.evict()
+        return
+
+    if args.incremental or args.watch:
+        manifest = load_manifest(manifest_path)
+    else:
+        manifest = new_manifest()
+        print("Deleting public directory...")
+        if os.path.exists(dir_path_public):
+            shutil.rmtree(dir_path_public)
+
+    assets = None
+    asset_manifest_path = os.path.join(dir_path_public, ASSET_MANIFEST_FILENAME)
+    if args.fingerprint:
+        print("Fingerprinting static files...")
+        with tracing.span("fingerprint", "build"):
+            hash_cache = load_hash_cache(hash_cache_path)
+            assets = fingerprint_static(dir_path_static, hash_cache)
+            save_manifest(hash_cache_path, hash_cache)
 
     print("Copying static files to public directory...")
-    copy_file_recursive(dir_path_static, dir_path_public)
+    with tracing.span("static files", "build"):
+        sync_static(dir_path_static, dir_path_public, manifest, args.checksum, assets)
+        if assets is not None:
+            write_asset_manifest(asset_manifest_path, assets)
+        elif os.path.exists(asset_manifest_path):
+            prune_output(asset_manifest_path, dir_path_public)
     print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    with tracing.span("content", "build"):
+        errors = generate_pages_incremental(
+            dir_path_content,
+            template_path,
+            dir_path_public,
+            basepath,
+            manifest,
+            args.jobs,
+            assets,
+            args.minify,
+            parse_cache,
+        )
+    if parse_cache is not None:
+        parse_cache.evict()
+    listings = []
+    if args.listing:
+        print("Writing listings...")
+        with tracing.span("listings", "build"):
+            listings = write_listings(dir_path_content, dir_path_public, args.listing, basepath)
+    prune_listings(dir_path_public, manifest, listings)
+    if args.compress:
+        with tracing.span("compress", "build"):
+            compress_outputs(dir_path_public, manifest)
+    elif manifest.get("compressed"):
+        remove_compressed_outputs(dir_path_public, manifest)
+    save_manifest(manifest_path, manifest)
+    if block_cache.hits or block_cache.misses:
+        print(f"Block cache: {block_cache.hits} hits, {block_cache.misses} misses")
+    if parse_cache is not None and (parse_cache.hits or parse_cache.misses):
+        print(f"Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses")
+
+    if args.trace:
+        events = tracing.disable()
+        tracing.write_trace(args.trace, events)
+        print(f"Wrote trace to {args.trace}")
+        for line in tracing.summarize(events):
+            print(line)
+
+    if errors:
+        print(f"{len(errors)} page(s) failed:")
+        for from_path, to_path, message in errors:
+            print(f" ! {from_path} -> {to_path}: {message}")
+
+    if args.watch:
+        watcher = Watcher(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            dir_path_public,
+            basepath,
+            manifest,
+            manifest_path,
+            compress=args.compress,
+            minify=args.minify,
+            listings=args.listing,
+            parse_cache=parse_cache,
+        )
+        watcher.run()
+    elif errors:
+        sys.exit(1)
 
-main()
+if __name__ == "__main__":
+    main()
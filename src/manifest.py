@@ -0,0 +1,49 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def new_manifest():
+    return {"version": MANIFEST_VERSION, "pages": {}, "static": {}}
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return new_manifest()
+    with open(path, 'r') as file:
+        try:
+            manifest = json.load(file)
+        except json.JSONDecodeError:
+            return new_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+    return manifest
+
+def save_manifest(path, manifest):
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    # Write next to the target and swap it in, so an interrupted build never
+    # leaves a half-written manifest behind.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def prune_output(path, root):
+    if os.path.exists(path):
+        os.remove(path)
+    root = os.path.abspath(root)
+    dir_path = os.path.dirname(os.path.abspath(path))
+    while dir_path != root and dir_path.startswith(root + os.sep):
+        if os.listdir(dir_path):
+            break
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
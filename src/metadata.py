@@ -0,0 +1,124 @@
+import json
+import os
+import re
+
+from manifest import prune_output
+from textnode import rebase_url
+from walker import walk
+
+TITLE_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+
+FRONT_MATTER_DELIMITER = "---"
+LISTING_FILENAME = "pages.json"
+_FIELD_RE = re.compile(r'^([A-Za-z0-9_-]+)\s*:\s*(.*?)\s*$')
+
+def extract_title_from_lines(lines):
+    for line in lines:
+        title = TITLE_RE.match(line.rstrip("\n"))
+        if title:
+            return title.group(1)
+    raise ValueError("No title found")
+
+def read_front_matter(file):
+    # Reads a block of "key: value" lines fenced by "---" lines at the top of
+    # the file and leaves the file positioned after it. Anything else, such as
+    # an unclosed fence or a line that is not a field, means there is no
+    # front matter and the file is put back where it was.
+    start = file.tell()
+    if file.readline().rstrip("\n").rstrip() != FRONT_MATTER_DELIMITER:
+        file.seek(start)
+        return {}
+    fields = {}
+    while True:
+        line = file.readline()
+        if not line:
+            break
+        line = line.rstrip("\n")
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            return fields
+        if not line.strip():
+            continue
+        field = _FIELD_RE.match(line)
+        if field is None:
+            break
+        value = field.group(2)
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        fields[field.group(1)] = value
+    file.seek(start)
+    return {}
+
+def read_header(file):
+    # Returns the front matter fields with a "title" filled in from the first
+    # "# " heading when the front matter has none, and leaves the file
+    # positioned at the start of the body.
+    fields = read_front_matter(file)
+    if "title" not in fields:
+        body_start = file.tell()
+        fields["title"] = extract_title_from_lines(iter(file.readline, ""))
+        file.seek(body_start)
+    return fields
+
+def body_first_line(file, start):
+    # The source line number of the body, for a file left at the body by
+    # reading its header from start: the header lines are read again to be
+    # counted, and the file is left at the body.
+    body_start = file.tell()
+    file.seek(start)
+    line = 1
+    while file.tell() != body_start and file.readline():
+        line += 1
+    return line
+
+def read_metadata(path):
+    # Only reads up to the end of the front matter, or to the title heading
+    # when the front matter has no title.
+    with open(path, 'r') as file:
+        return read_header(file)
+
+def page_url(rel_path):
+    # "blog/tom/index.md" -> "/blog/tom", "contact.md" -> "/contact.html"
+    parts = rel_path.replace(os.sep, "/").split("/")
+    if parts[-1] == "index.md":
+        return "/" + "/".join(parts[:-1])
+    parts[-1] = parts[-1][:-len(".md")] + ".html"
+    return "/" + "/".join(parts)
+
+def list_pages(dir_path_content, section="", basepath="/"):
+    # Metadata of every page under content/<section>, below the section's own
+    # index page, newest first when pages carry a date and by URL otherwise.
+    pages = []
+    for rel_path, entry in walk(os.path.join(dir_path_content, section)):
+        if not entry.name.endswith(".md") or rel_path == "index.md":
+            continue
+        page = read_metadata(entry.path)
+        page["url"] = rebase_url(page_url(os.path.join(section, rel_path)), basepath)
+        pages.append(page)
+    pages.sort(key=lambda page: page["url"])
+    pages.sort(key=lambda page: page.get("date", ""), reverse=True)
+    return pages
+
+def write_listing(path, pages):
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(pages, file, indent=1)
+
+def write_listings(dir_path_content, dest_dir_path, sections, basepath="/"):
+    paths = []
+    for section in sections:
+        path = os.path.join(dest_dir_path, section, LISTING_FILENAME)
+        print(f" * {os.path.join(dir_path_content, section)} -> {path}")
+        write_listing(path, list_pages(dir_path_content, section, basepath))
+        paths.append(path)
+    return paths
+
+def prune_listings(dest_dir_path, manifest, paths):
+    # Removes the listings an earlier build wrote for sections that are no
+    # longer listed, and records the ones written now.
+    for path in manifest.get("listings", []):
+        if path not in paths:
+            print(f" * removing {path}")
+            prune_output(path, dest_dir_path)
+    manifest["listings"] = sorted(paths)
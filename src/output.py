@@ -0,0 +1,84 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import span
+
+DEFAULT_WORKERS = 4
+
+def make_dirs(paths, made=None):
+    # Creates the parent directory of every path once, so writers never have
+    # to check for it per file. Directories recorded in made are skipped and
+    # new ones are added to it.
+    if made is None:
+        made = set()
+    for dir_path in sorted({os.path.dirname(path) for path in paths}):
+        if dir_path and dir_path not in made:
+            os.makedirs(dir_path, exist_ok=True)
+            made.add(dir_path)
+    return made
+
+def write_file(path, content):
+    # content is a string or an iterable of string chunks, which are written
+    # as they are produced.
+    with open(path, 'w') as file:
+        if isinstance(content, str):
+            file.write(content)
+        else:
+            file.writelines(content)
+
+class OutputWriter:
+    # Writes files on a small thread pool so disk latency overlaps with
+    # rendering. At most queue_size writes are pending at a time; write()
+    # blocks once the queue is full. With workers=0 files are written in the
+    # calling thread, streaming chunked content, and errors are raised right
+    # away. Queued writes need the whole content, so chunks are joined in the
+    # calling thread first.
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=None):
+        self.workers = workers
+        self.errors = []
+        self.executor = None
+        if workers > 0:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="output")
+            self.pending = threading.BoundedSemaphore(queue_size or workers * 4)
+
+    def write(self, path, content):
+        if self.executor is None:
+            write_file(path, content)
+            return
+        if not isinstance(content, str):
+            content = "".join(content)
+        self.pending.acquire()
+        try:
+            self.executor.submit(self._write, path, content)
+        except BaseException:
+            self.pending.release()
+            raise
+
+    def _write(self, path, content):
+        try:
+            with span("write", path=path):
+                write_file(path, content)
+        except Exception as e:
+            self.errors.append((path, f"{type(e).__name__}: {e}"))
+        finally:
+            self.pending.release()
+
+    def close(self):
+        # Waits for every queued write to finish and returns the
+        # (path, message) pairs of those that failed.
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        errors = sorted(self.errors)
+        self.errors = []
+        return errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __repr__(self):
+        return f"OutputWriter(workers={self.workers})"
@@ -0,0 +1,123 @@
+import contextlib
+import hashlib
+import json
+import os
+
+# Bump whenever a change to parsing or serializing alters the rendered HTML,
+# so bodies cached by an older build are never reused and pages it wrote are
+# rendered again by incremental builds.
+PARSER_VERSION = 2
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+def _read_chunks(file):
+    with file:
+        while True:
+            chunk = file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+class ParseCache:
+    # Rendered page bodies on disk, one JSON file per entry, keyed by the
+    # source's content hash and everything else the body depends on. Entries
+    # are only read when a page asks for them; evict() trims the cache to
+    # max_bytes, dropping the least recently used entries first.
+    def __init__(self, dir_path, max_bytes=DEFAULT_MAX_BYTES):
+        self.dir_path = dir_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source_hash, basepath="/", assets=None, minify=False):
+        assets_key = "" if assets is None else assets.key
+        parts = [str(PARSER_VERSION), source_hash, basepath, assets_key, "1" if minify else "0"]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.dir_path, key[:2], key + ".json")
+
+    def open_entry(self, key):
+        # Returns (title, chunks) for a cached body, where chunks streams the
+        # HTML from disk, or None. An entry is the title as a JSON string on
+        # the first line followed by the HTML as is.
+        path = self.entry_path(key)
+        try:
+            file = open(path, 'r')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            title = json.loads(file.readline())
+            if not isinstance(title, str):
+                raise ValueError("not a title")
+        except ValueError:
+            # A torn or foreign file is dropped and rendered again.
+            file.close()
+            os.remove(path)
+            self.misses += 1
+            return None
+        # The modification time doubles as the last use for eviction.
+        os.utime(path)
+        self.hits += 1
+        return title, _read_chunks(file)
+
+    def get(self, key):
+        entry = self.open_entry(key)
+        if entry is None:
+            return None
+        title, chunks = entry
+        return title, "".join(chunks)
+
+    def iter_put(self, key, title, chunks):
+        # Stores an entry while passing its HTML chunks through, so a page
+        # can be written out and cached in the same pass. The entry is only
+        # kept once every chunk has gone through.
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Workers may store the same entry at once, so each writes its own
+        # temporary file and swaps it in.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                file.write(json.dumps(title) + "\n")
+                for chunk in chunks:
+                    file.write(chunk)
+                    yield chunk
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+
+    def put(self, key, title, html):
+        for _ in self.iter_put(key, title, [html]):
+            pass
+
+    def evict(self):
+        entries = []
+        total = 0
+        if not os.path.isdir(self.dir_path):
+            return 0
+        with os.scandir(self.dir_path) as dirs:
+            for dir_entry in dirs:
+                if not dir_entry.is_dir():
+                    continue
+                with os.scandir(dir_entry.path) as files:
+                    for entry in files:
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                        total += stat.st_size
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def __repr__(self):
+        return f"ParseCache({self.dir_path!r}, max_bytes={self.max_bytes})"
@@ -0,0 +1,142 @@
+import http.server
+import json
+import mimetypes
+import os
+import urllib.parse
+
+from blockcache import BlockCache
+from gencontent import find_page, render_page
+from metadata import LISTING_FILENAME, list_pages
+from walker import is_ignored
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8000
+
+def stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+class PreviewSite:
+    # Answers requests straight from ./content and ./static without building
+    # the site: pages are rendered the first time they are asked for and kept
+    # in an LRU cache until their source or template changes.
+    def __init__(
+        self,
+        dir_path_content,
+        dir_path_static,
+        template_path,
+        BASEPATH,
+        minify=False,
+        listings=(),
+        parse_cache=None,
+        cache_size=DEFAULT_CACHE_SIZE,
+    ):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.BASEPATH = BASEPATH
+        self.minify = minify
+        self.listings = listings
+        self.parse_cache = parse_cache
+        self.pages = BlockCache(cache_size)
+
+    def resolve(self, url):
+        # Maps a request URL back to ("page", source), ("static", file) or
+        # ("listing", section), the inverse of the paths a build writes.
+        path = urllib.parse.unquote(urllib.parse.urlsplit(url).path)
+        if self.BASEPATH != "/":
+            if not (path + "/").startswith(self.BASEPATH):
+                return None
+            path = path[len(self.BASEPATH) - 1:]
+        parts = [part for part in path.split("/") if part and part != "."]
+        if any(part == ".." or is_ignored(part) for part in parts):
+            return None
+        directory = not parts or path.endswith("/")
+        if not directory:
+            static_path = os.path.join(self.dir_path_static, *parts)
+            if os.path.isfile(static_path):
+                return "static", static_path
+            section = "/".join(parts[:-1])
+            if parts[-1] == LISTING_FILENAME and section in self.listings:
+                return "listing", section
+            if parts[-1].endswith(".html"):
+                from_path = os.path.join(self.dir_path_content, *parts[:-1], parts[-1][:-len(".html")] + ".md")
+                if os.path.isfile(from_path):
+                    return "page", from_path
+                return None
+        from_path = os.path.join(self.dir_path_content, *parts, "index.md")
+        if os.path.isfile(from_path):
+            return "page", from_path
+        return None
+
+    def render(self, from_path):
+        from_path, template_path, _ = find_page(from_path, self.dir_path_content, "", self.template_path)
+        # A new template.html closer to the page changes template_path, so it
+        # is part of the stamp along with the modification times.
+        page_stamp = (stamp(from_path), template_path, stamp(template_path))
+        cached = self.pages.get(from_path)
+        if cached is not None and cached[0] == page_stamp:
+            return cached[1]
+        html = render_page(from_path, template_path, self.BASEPATH, minify=self.minify, parse_cache=self.parse_cache)
+        self.pages.put(from_path, (page_stamp, html))
+        return html
+
+    def get(self, url):
+        # Returns (status, content type, body bytes).
+        target = self.resolve(url)
+        if target is None:
+            return 404, "text/plain; charset=utf-8", b"Not found\n"
+        kind, path = target
+        if kind == "page":
+            return 200, "text/html; charset=utf-8", self.render(path).encode()
+        if kind == "listing":
+            pages = list_pages(self.dir_path_content, path, self.BASEPATH)
+            return 200, "application/json", json.dumps(pages, indent=1).encode()
+        with open(path, 'rb') as file:
+            body = file.read()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return 200, content_type, body
+
+    def __repr__(self):
+        return f"PreviewSite({self.dir_path_content!r}, {self.dir_path_static!r}, pages={len(self.pages)})"
+
+class PreviewHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        try:
+            status, content_type, body = self.server.site.get(self.path)
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}"
+            print(f" ! {self.path}: {message}")
+            status, content_type, body = 500, "text/plain; charset=utf-8", (message + "\n").encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        # Sources change while previewing, so the browser always asks again.
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+def make_server(site, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    # Requests are handled one at a time, which keeps the shared caches free
+    # of locking.
+    server = http.server.HTTPServer((host, port), PreviewHandler)
+    server.site = site
+    return server
+
+def serve(site, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = make_server(site, host, port)
+    print(f"Serving on http://{host}:{server.server_address[1]}{site.BASEPATH}, press Ctrl-C to stop...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
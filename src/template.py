@@ -0,0 +1,147 @@
+import os
+import re
+
+from htmlnode import collapse_whitespace
+
+TEMPLATE_FILENAME = "template.html"
+
+SLOTS = {
+    "{{ Title }}": "Title",
+    "{{ Content }}": "Content",
+}
+
+_templates = {}
+
+_MARKUP_RE = re.compile(r"<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)?[^>]*>", re.DOTALL)
+
+# Content of these tags is copied as is when minifying.
+_RAW_TAGS = frozenset(("pre", "textarea", "script", "style"))
+
+# Whitespace next to these tags does not render, so minifying drops it.
+# Anywhere else a run of whitespace still renders as one space.
+_BLOCK_TAGS = frozenset((
+    "", "html", "head", "title", "meta", "link", "script", "style", "base", "body",
+    "header", "footer", "main", "nav", "article", "section", "aside", "div", "p",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd",
+    "blockquote", "pre", "figure", "figcaption", "table", "thead", "tbody", "tfoot",
+    "tr", "th", "td", "form", "hr", "br", "noscript",
+))
+
+def minify_markup(source):
+    # Splits the source into tags and text, drops comments (but keeps
+    # conditional ones) and collapses whitespace in the text between tags.
+    lowered = source.lower()
+    tokens = []
+    position = 0
+    while True:
+        match = _MARKUP_RE.search(source, position)
+        end = len(source) if match is None else match.start()
+        if end > position:
+            if tokens and tokens[-1][0] is None:
+                tokens[-1] = (None, tokens[-1][1] + source[position:end])
+            else:
+                tokens.append((None, source[position:end]))
+        if match is None:
+            break
+        markup = match.group()
+        name = (match.group(2) or "").lower()
+        position = match.end()
+        if not match.group(1) and name in _RAW_TAGS:
+            close = lowered.find(f"</{name}", position)
+            if close != -1:
+                close = source.find(">", close)
+            close = len(source) if close == -1 else close + 1
+            markup = source[match.start():close]
+            position = close
+        if markup.startswith("<!--") and not markup.startswith("<!--[if"):
+            continue
+        tokens.append((name, markup))
+
+    pieces = []
+    for index, (name, text) in enumerate(tokens):
+        if name is not None:
+            pieces.append(text)
+            continue
+        text = collapse_whitespace(text)
+        if index == 0 or tokens[index - 1][0] in _BLOCK_TAGS:
+            text = text.lstrip(" ")
+        if index == len(tokens) - 1 or tokens[index + 1][0] in _BLOCK_TAGS:
+            text = text.rstrip(" ")
+        pieces.append(text)
+    return "".join(pieces)
+
+def rebase_urls(html, basepath):
+    if basepath == "/":
+        return html
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+class Template:
+    def __init__(self, source, basepath="/", assets=None, minify=False):
+        self.parts = []
+        self.slots = []
+        if minify:
+            source = minify_markup(source)
+        if assets is not None:
+            source = assets.rewrite_html(source)
+        self.compile(rebase_urls(source, basepath))
+
+    def compile(self, source):
+        # Split the source once into literal segments with slot positions in
+        # between, so rendering a page is a single join.
+        start = 0
+        while True:
+            found = None
+            for placeholder, name in SLOTS.items():
+                index = source.find(placeholder, start)
+                if index != -1 and (found is None or index < found[0]):
+                    found = (index, placeholder, name)
+            if found is None:
+                break
+            index, placeholder, name = found
+            self.parts.append(source[start:index])
+            self.slots.append((len(self.parts), name))
+            self.parts.append("")
+            start = index + len(placeholder)
+        self.parts.append(source[start:])
+
+    def render(self, **values):
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            parts[index] = values.get(name, "")
+        return "".join(parts)
+
+    def iter_render(self, **values):
+        # Yields the page piece by piece. Slot values may be strings or
+        # iterables of string chunks, which are passed on as they come, so a
+        # page can be written out without ever being held whole.
+        slots = dict(self.slots)
+        for index, part in enumerate(self.parts):
+            if index not in slots:
+                yield part
+                continue
+            value = values.get(slots[index], "")
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def __repr__(self):
+        return f"Template(slots={[name for _, name in self.slots]})"
+
+def load_template(template_path, basepath="/", assets=None, minify=False):
+    stat = os.stat(template_path)
+    key = (os.path.abspath(template_path), basepath, assets, minify)
+    cached = _templates.get(key)
+    if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    with open(template_path, 'r') as file:
+        template = Template(file.read(), basepath, assets, minify)
+    _templates[key] = ((stat.st_mtime_ns, stat.st_size), template)
+    return template
+
+def find_template(dir_path, default_template_path):
+    path = os.path.join(dir_path, TEMPLATE_FILENAME)
+    if os.path.isfile(path):
+        return path
+    return default_template_path
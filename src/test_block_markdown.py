@@ -1,7 +1,10 @@
+import io
 import unittest
 from block_markdown import (
     markdown_to_blocks,
     block_to_block_type,
+    iter_blocks,
+    markdown_lines_to_html_node,
     markdown_to_html_node,
     BlockType
 )
@@ -58,6 +61,37 @@ class TestMarkdownToBlocks(unittest.TestCase):
         expected = ["First block.", "Second block."]
         self.assertEqual(markdown_to_blocks(markdown), expected)
 
+class TestIterBlocks(unittest.TestCase):
+    def test_typed_blocks_from_file(self):
+        stream = io.StringIO("# Title\n\n- a\n- b\n\n```\ncode\n```\n")
+        self.assertEqual(
+            list(iter_blocks(stream)),
+            [
+                (BlockType.HEADING, ["# Title"]),
+                (BlockType.UNORDERED_LIST, ["- a", "- b"]),
+                (BlockType.CODE, ["```", "code", "```"]),
+            ],
+        )
+
+    def test_blocks_are_yielded_lazily(self):
+        def lines():
+            yield "first\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_blocks(lines())), (BlockType.PARAGRAPH, ["first"]))
+
+    def test_odd_newline_runs_match_split(self):
+        for markdown in ["a\n\n\nb", "\n\n\n", "a\n\n  \n\nb", "  a\n  b  \n\n"]:
+            expected = [block.strip() for block in markdown.split("\n\n") if block != ""]
+            self.assertEqual(markdown_to_blocks(markdown), expected)
+
+    def test_lines_to_html_node(self):
+        stream = io.StringIO("> quote\n> more\n\n1. one\n2. two")
+        self.assertEqual(
+            markdown_lines_to_html_node(stream).to_html(),
+            "<div><blockquote>quote more</blockquote><ol><li>one</li><li>two</li></ol></div>",
+        )
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_heading(self):
         self.assertEqual(block_to_block_type("# Heading 1"), BlockType.HEADING)
@@ -179,3 +213,11 @@ class TestMarkdownToHtmlNode(unittest.TestCase):
         html_node = markdown_to_html_node(markdown)
         self.assert_html_equal(html_node,
             "<div><p>This has <b>bold</b> and <i>italic</i> text, and <code>code</code> too.</p></div>")
+
+    def test_basepath_rewrites_links_only(self):
+        """Test that the basepath applies to link and image URLs but not to code"""
+        markdown = '[a](/a) ![b](/b.png)\n\n```\n<a href="/x">\n```'
+        html_node = markdown_to_html_node(markdown, basepath="/public/")
+        self.assert_html_equal(html_node,
+            '<div><p><a href="/public/a">a</a> <img src="/public/b.png" alt="b" /></p>'
+            '<pre><code>&lt;a href="/x"&gt;\n</code></pre></div>')
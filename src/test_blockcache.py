@@ -0,0 +1,93 @@
+import unittest
+
+from blockcache import BlockCache
+from block_markdown import markdown_to_html_node
+
+class TestBlockCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = BlockCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "<p>a</p>")
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_zero_size_disables(self):
+        cache = BlockCache(maxsize=0)
+        cache.put("a", "A")
+        self.assertEqual(len(cache), 0)
+
+    def test_evicts_beyond_byte_budget(self):
+        cache = BlockCache(max_bytes=5)
+        cache.put("a", "AA")
+        cache.put("b", "BB")
+        cache.put("c", "CC")
+        self.assertEqual((len(cache), cache.bytes), (2, 4))
+        self.assertIsNone(cache.get("a"))
+        cache.put("b", "B")
+        self.assertEqual(cache.bytes, 3)
+
+    def test_skips_large_entries(self):
+        cache = BlockCache(max_entry_bytes=2)
+        cache.put("a", "AAA")
+        cache.put("b", "BB")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "BB")
+
+    def test_clear(self):
+        cache = BlockCache()
+        cache.put("a", "A")
+        cache.get("a")
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+class TestCachedRendering(unittest.TestCase):
+    def test_same_output_with_cache(self):
+        markdown = "# Title\n\nDisclaimer with **bold**\n\n- nav\n- links\n\n```\ncode\n```"
+        cache = BlockCache()
+        expected = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (4, 4))
+
+    def test_basepath_is_part_of_the_key(self):
+        cache = BlockCache()
+        markdown = "[home](/)"
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), '<div><p><a href="/">home</a></p></div>')
+        self.assertEqual(
+            markdown_to_html_node(markdown, cache, "/public/").to_html(),
+            '<div><p><a href="/public/">home</a></p></div>',
+        )
+
+    def test_minify_is_part_of_the_key(self):
+        cache = BlockCache()
+        markdown = "a  b"
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), "<div><p>a  b</p></div>")
+        self.assertEqual(markdown_to_html_node(markdown, cache, minify=True).to_html(), "<div><p>a b</p></div>")
+
+    def test_large_blocks_are_not_cached(self):
+        cache = BlockCache(max_entry_bytes=16)
+        markdown = "short\n\n" + "long " * 10
+        expected = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        self.assertEqual((len(cache), cache.hits, cache.misses), (1, 1, 1))
+
+    def test_invalid_blocks_are_not_cached(self):
+        cache = BlockCache()
+        with self.assertRaises(ValueError):
+            markdown_to_html_node("broken `code", cache)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import gzip
+import os
+import unittest
+from unittest import mock
+
+import compress
+from compress import compress_outputs, remove_compressed_outputs
+from fixtures import TempDirTestCase
+from manifest import new_manifest
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.root, "docs")
+        self.page = os.path.join(self.docs, "blog", "index.html")
+        self.write(self.page, "<p>hello</p>" * 100)
+        self.write(os.path.join(self.docs, "index.css"), "body {}")
+        self.write(os.path.join(self.docs, "a.png"), "png")
+
+    def test_writes_gzip_sidecars_for_text_outputs(self):
+        manifest = new_manifest()
+        compressed = compress_outputs(self.docs, manifest)
+        self.assertEqual(sorted(compressed), sorted([self.page, os.path.join(self.docs, "index.css")]))
+        with gzip.open(self.page + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>hello</p>" * 100)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "a.png.gz")))
+
+    def test_only_changed_bytes_are_recompressed(self):
+        manifest = new_manifest()
+        compress_outputs(self.docs, manifest)
+        # Rewriting a page with the same bytes does not count as a change.
+        self.write(self.page, "<p>hello</p>" * 100)
+        self.assertEqual(compress_outputs(self.docs, manifest), [])
+        self.write(self.page, "<p>changed</p>")
+        self.assertEqual(compress_outputs(self.docs, manifest), [self.page])
+        os.remove(self.page + ".gz")
+        self.assertEqual(compress_outputs(self.docs, manifest), [self.page])
+
+    def test_unchanged_outputs_are_not_hashed_again(self):
+        manifest = new_manifest()
+        compress_outputs(self.docs, manifest)
+        self.write(self.page, "<p>changed</p>")
+        with mock.patch.object(compress, "hash_file", wraps=compress.hash_file) as hash_file:
+            self.assertEqual(compress_outputs(self.docs, manifest), [self.page])
+        hash_file.assert_called_once_with(self.page)
+
+    def test_digest_only_entries_are_recompressed(self):
+        manifest = new_manifest()
+        compress_outputs(self.docs, manifest)
+        manifest["compressed"] = {path: entry[0] for path, entry in manifest["compressed"].items()}
+        self.assertEqual(len(compress_outputs(self.docs, manifest)), 2)
+
+    def test_sidecars_of_removed_outputs_are_pruned(self):
+        manifest = new_manifest()
+        compress_outputs(self.docs, manifest)
+        os.remove(self.page)
+        compress_outputs(self.docs, manifest)
+        self.assertFalse(os.path.exists(os.path.dirname(self.page)))
+
+        remove_compressed_outputs(self.docs, manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css.gz")))
+        self.assertNotIn("compressed", manifest)
+
+    def test_brotli_sidecars_when_available(self):
+        fake = mock.Mock()
+        fake.compress.side_effect = lambda data: b"br:" + data
+        with mock.patch.object(compress, "brotli", fake):
+            compress_outputs(self.docs, new_manifest())
+        with open(os.path.join(self.docs, "index.css.br"), "rb") as file:
+            self.assertEqual(file.read(), b"br:body {}")
+
+    def test_stale_brotli_sidecar_is_removed_without_brotli(self):
+        fake = mock.Mock()
+        fake.compress.side_effect = lambda data: b"br:" + data
+        manifest = new_manifest()
+        with mock.patch.object(compress, "brotli", fake):
+            compress_outputs(self.docs, manifest)
+        self.write(os.path.join(self.docs, "index.css"), "body { color: red }")
+        with mock.patch.object(compress, "brotli", None):
+            compress_outputs(self.docs, manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css.br")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.css.gz")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+
+from copystatic import file_unchanged, sync_static
+from fixtures import TempDirTestCase
+from manifest import new_manifest
+
+class TestSyncStatic(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def test_copies_new_files(self):
+        manifest = new_manifest()
+        sync_static(self.static, self.docs, manifest)
+        self.assertEqual(self.read(os.path.join(self.docs, "images", "a.png")), "png")
+        self.assertEqual(len(manifest["static"]), 2)
+
+    def test_unchanged_files_are_not_copied(self):
+        manifest = new_manifest()
+        sync_static(self.static, self.docs, manifest)
+        dest = os.path.join(self.docs, "index.css")
+        before = os.stat(dest).st_ino, os.stat(dest).st_mtime_ns
+        sync_static(self.static, self.docs, manifest)
+        self.assertEqual(before, (os.stat(dest).st_ino, os.stat(dest).st_mtime_ns))
+
+    def test_changed_files_are_copied(self):
+        manifest = new_manifest()
+        sync_static(self.static, self.docs, manifest)
+        src = os.path.join(self.static, "index.css")
+        self.write(src, "body { color: red }")
+        sync_static(self.static, self.docs, manifest)
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body { color: red }")
+
+    def test_checksum_ignores_mtime_only_changes(self):
+        manifest = new_manifest()
+        sync_static(self.static, self.docs, manifest)
+        src = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.docs, "index.css")
+        os.utime(src, ns=(0, 0))
+        self.assertFalse(file_unchanged(src, dest))
+        self.assertTrue(file_unchanged(src, dest, checksum=True))
+
+    def test_stale_files_are_removed(self):
+        manifest = new_manifest()
+        sync_static(self.static, self.docs, manifest)
+        self.write(os.path.join(self.docs, "index.html"), "generated page")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        sync_static(self.static, self.docs, manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+if __name__ == "__main__":
+    unittest.main()
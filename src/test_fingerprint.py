@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import unittest
+
+from copystatic import sync_static
+from fingerprint import cached_hash, fingerprint_name, fingerprint_static, write_asset_manifest
+from fixtures import TempDirTestCase
+from gencontent import generate_pages, find_pages
+from manifest import new_manifest
+from template import Template
+
+class TestFingerprint(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.css = os.path.join(self.static, "index.css")
+        self.png = os.path.join(self.static, "images", "a.png")
+        self.write(self.css, "body {}")
+        self.write(self.png, "png")
+        self.css_hash = hashlib.sha256(b"body {}").hexdigest()
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("images/a.png", "0123456789abcdef"), "images/a.0123456789.png")
+
+    def test_cached_hash_skips_unchanged_files(self):
+        hash_cache = {}
+        self.assertEqual(cached_hash(self.css, hash_cache), self.css_hash)
+        hash_cache[self.css][2] = "cached"
+        self.assertEqual(cached_hash(self.css, hash_cache), "cached")
+        self.write(self.css, "body { color: red }")
+        self.assertNotEqual(cached_hash(self.css, hash_cache), "cached")
+
+    def test_asset_map(self):
+        hash_cache = {os.path.join(self.static, "gone.css"): [0, 0, "x"]}
+        assets = fingerprint_static(self.static, hash_cache)
+        hashed = f"/index.{self.css_hash[:10]}.css"
+        self.assertEqual(assets.get("/index.css"), hashed)
+        self.assertEqual(assets.entries["/index.css"]["etag"], f'"{self.css_hash}"')
+        self.assertEqual(sorted(hash_cache), sorted([self.css, self.png]))
+        self.assertEqual(assets, fingerprint_static(self.static, hash_cache))
+        self.assertEqual(
+            assets.rewrite_html('<link href="/index.css" /><a href="/other.css">'),
+            f'<link href="{hashed}" /><a href="/other.css">',
+        )
+
+        path = os.path.join(self.root, "asset-manifest.json")
+        write_asset_manifest(path, assets)
+        with open(path) as file:
+            self.assertEqual(json.load(file)["/index.css"]["path"], hashed)
+
+    def test_sync_static_copies_hashed_names(self):
+        assets = fingerprint_static(self.static, {})
+        manifest = new_manifest()
+        sync_static(self.static, self.docs, manifest, assets=assets)
+        hashed_css = os.path.join(self.docs, f"index.{self.css_hash[:10]}.css")
+        self.assertEqual(self.read(hashed_css), "body {}")
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+        self.write(self.css, "body { color: red }")
+        assets = fingerprint_static(self.static, {})
+        sync_static(self.static, self.docs, manifest, assets=assets)
+        self.assertFalse(os.path.exists(hashed_css))
+
+    def test_pages_and_template_reference_hashed_names(self):
+        assets = fingerprint_static(self.static, {})
+        template = Template('<link href="/index.css" />{{ Content }}', "/public/", assets)
+        self.assertEqual(template.render(), f'<link href="/public/index.{self.css_hash[:10]}.css" />')
+
+        content = os.path.join(self.root, "content")
+        template_path = os.path.join(self.root, "template.html")
+        self.write(os.path.join(content, "index.md"), "# Home\n\n![a](/images/a.png) [css](/index.css)")
+        self.write(template_path, "{{ Content }}")
+        pages = find_pages(content, self.docs, template_path)
+        self.assertEqual(generate_pages(pages, "/", assets=assets), [])
+        html = self.read(os.path.join(self.docs, "index.html"))
+        self.assertIn(f'src="{assets.get("/images/a.png")}"', html)
+        self.assertIn(f'href="{assets.get("/index.css")}"', html)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,16 @@
+import os
 import unittest
-from gencontent import extract_title
+from block_markdown import markdown_to_html_node
+from fixtures import TempDirTestCase
+from gencontent import (
+    extract_title,
+    find_pages,
+    generate_pages,
+    render_document,
+    render_many,
+)
+from inline_markdown import MarkdownSyntaxError
+from metadata import extract_title_from_lines
 
 class TestGenContext(unittest.TestCase):
     def test_basic_title(self):
@@ -65,3 +76,128 @@ class TestGenContext(unittest.TestCase):
         markdown = ""
         with self.assertRaises(ValueError):
             extract_title(markdown)
+
+class TestExtractTitleFromLines(unittest.TestCase):
+    def test_stops_at_first_title(self):
+        def lines():
+            yield "intro\n"
+            yield "#  My Title\n"
+            raise AssertionError("read past the title")
+        self.assertEqual(extract_title_from_lines(lines()), "My Title")
+
+    def test_no_title(self):
+        with self.assertRaises(ValueError):
+            extract_title_from_lines(["## Sub\n", "# \n", "text"])
+
+class TestGeneratePages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for name, text in [
+            ("a.md", "# A\n\n[home](/)"),
+            ("b/b.md", "# B\n\nbody"),
+            ("b/c.md", "# C\n\n`unclosed"),
+        ]:
+            self.write(os.path.join(self.content, name), text)
+
+    def read_outputs(self):
+        outputs = {}
+        for _, _, to_path in find_pages(self.content, self.docs, self.template):
+            if os.path.exists(to_path):
+                outputs[to_path] = self.read(to_path)
+        return outputs
+
+    def test_errors_are_reported_per_page(self):
+        pages = find_pages(self.content, self.docs, self.template)
+        errors = generate_pages(pages, "/")
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0][0].endswith("c.md"))
+        self.assertIn("formatted section not closed", errors[0][2])
+        self.assertEqual(len(self.read_outputs()), 2)
+
+    def test_write_errors_are_reported_per_page(self):
+        pages = find_pages(self.content, self.docs, self.template)
+        os.makedirs(os.path.join(self.docs, "a.html"))
+        errors = generate_pages(pages, "/")
+        failed = [from_path for from_path, _, _ in errors]
+        self.assertEqual(failed, [os.path.join(self.content, "a.md"), os.path.join(self.content, "b/c.md")])
+        self.assertIn("IsADirectoryError", errors[0][2])
+
+    def test_front_matter_is_not_rendered(self):
+        path = os.path.join(self.content, "fm.md")
+        self.write(path, "---\ntitle: From Front Matter\n---\n# Heading\n\nbody")
+        to_path = os.path.join(self.docs, "fm.html")
+        self.assertEqual(generate_pages([(path, self.template, to_path)], "/"), [])
+        self.assertEqual(self.read(to_path), "<title>From Front Matter</title><div><h1>Heading</h1><p>body</p></div>")
+
+    def test_parallel_matches_serial(self):
+        pages = find_pages(self.content, self.docs, self.template)
+        serial_errors = generate_pages(pages, "/public/")
+        serial = self.read_outputs()
+        for to_path in serial:
+            os.remove(to_path)
+        parallel_errors = generate_pages(pages, "/public/", jobs=2)
+        self.assertEqual(serial_errors, parallel_errors)
+        self.assertEqual(serial, self.read_outputs())
+
+class TestRenderMany(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+
+    def documents(self, count):
+        for index in range(count):
+            yield f"doc{index}", f"# Doc {index}\n\nShared footer\n\n[link](/doc{index})"
+
+    def test_bodies_match_markdown_to_html_node(self):
+        markdown = "# Doc\n\n* one\n* two\n\n```\ncode\n```"
+        ((name, html),) = render_many([("doc", markdown)])
+        self.assertEqual(name, "doc")
+        self.assertEqual(html, markdown_to_html_node(markdown).to_html())
+
+    def test_body_needs_no_title_and_skips_front_matter(self):
+        self.assertEqual(render_document("---\ndraft: yes\n---\nbody"), "<div><p>body</p></div>")
+
+    def test_syntax_errors_point_into_the_source(self):
+        for markdown, position in [
+            ("---\ndraft: yes\n---\n# T\n\ntext\n  more [open", (7, 8)),
+            ("# T\n\n- a\n- b `c", (4, 5)),
+            ("# T\n\n  > a\n>>  b _c", (4, 7)),
+        ]:
+            with self.assertRaises(MarkdownSyntaxError) as cm:
+                render_document(markdown)
+            self.assertEqual((cm.exception.line, cm.exception.column), position)
+
+    def test_title_is_escaped(self):
+        html = render_document("# Fish & <Chips>", self.template)
+        self.assertTrue(html.startswith("<title>Fish &amp; &lt;Chips&gt;</title>"))
+        self.assertIn("<h1>Fish &amp; &lt;Chips&gt;</h1>", html)
+
+    def test_pages_with_template(self):
+        html = dict(render_many(self.documents(2), self.template, "/site/"))
+        self.assertEqual(
+            html["doc1"],
+            '<title>Doc 1</title><a href="/site/">home</a>'
+            '<div><h1>Doc 1</h1><p>Shared footer</p><p><a href="/site/doc1">link</a></p></div>',
+        )
+
+    def test_lazy(self):
+        documents = self.documents(100)
+        rendered = render_many(documents)
+        self.assertEqual(next(rendered)[0], "doc0")
+        self.assertEqual(next(documents)[0], "doc1")
+
+    def test_parallel_matches_serial_in_order(self):
+        serial = list(render_many(self.documents(20), self.template))
+        self.assertEqual(list(render_many(self.documents(20), self.template, jobs=2)), serial)
+
+    def test_errors_are_raised(self):
+        with self.assertRaises(ValueError):
+            list(render_many([("doc", "no title")], self.template))
+        with self.assertRaises(MarkdownSyntaxError):
+            list(render_many([("a", "# A"), ("b", "`unclosed")], jobs=2))
+
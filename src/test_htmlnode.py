@@ -1,5 +1,5 @@
 import unittest
-from src.htmlnode import HTMLNode, LeafNode, ParentNode
+from src.htmlnode import EMPTY_PROPS, HTMLNode, LeafNode, ParentNode, RawNode, escape_attribute, escape_text
 
 class TestHtmlNode(unittest.TestCase):
     def test_to_html_props(self):
@@ -99,5 +99,81 @@ class TestHtmlNode(unittest.TestCase):
             "HTMLNode(tag='p', value='What a strange world', children=None, props={'class': 'primary'})",
         )
 
+    def test_iter_html_chunks(self):
+        node = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])
+        self.assertEqual(list(node.iter_html()), ["<p>", "<b>bold</b>", " text", "</p>"])
+
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [ParentNode("ul", [ParentNode("li", [LeafNode(None, "a")])])])
+        self.assertEqual("".join(node.iter_html()), "<div><ul><li>a</li></ul></div>")
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_minify_collapses_text_outside_pre_and_code(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "a  \n b"), LeafNode("code", "x  y"), LeafNode("b", " c\u00a0 d ")]),
+            ParentNode("pre", [ParentNode("code", [LeafNode(None, "keep\n    this")])]),
+        ])
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<div><p>a b<code>x  y</code><b> c\u00a0 d </b></p><pre><code>keep\n    this</code></pre></div>",
+        )
+        self.assertIn("a  \n b", node.to_html())
+
+    def test_deep_tree(self):
+        node = LeafNode(None, "x")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + 1)
+
+    def test_nested_parent_without_tag(self):
+        node = ParentNode("div", [ParentNode(None, [LeafNode(None, "x")])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in [HTMLNode("p"), LeafNode(None, "x"), ParentNode("div", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_default_props_are_shared_and_read_only(self):
+        first = LeafNode(None, "a")
+        second = LeafNode("b", "b")
+        self.assertIs(first.props, second.props)
+        self.assertIs(first.props, EMPTY_PROPS)
+        with self.assertRaises(TypeError):
+            first.props["class"] = "x"
+        with self.assertRaises(TypeError):
+            HTMLNode("div").children.append(first)
+
+    def test_tags_are_interned(self):
+        tag = "".join(["s", "pan"])
+        self.assertIs(LeafNode(tag, "x").tag, LeafNode("span", "y").tag)
+
+    def test_img_with_props(self):
+        leaf = LeafNode("img", "", {"src": "a.png", "alt": "a"})
+        self.assertEqual(leaf.to_html(), '<img src="a.png" alt="a" />')
+
+    def test_text_is_escaped(self):
+        node = ParentNode("p", [LeafNode(None, "a < b & c > d \"e\""), LeafNode("code", "<br>")])
+        self.assertEqual(node.to_html(), '<p>a &lt; b &amp; c &gt; d "e"<code>&lt;br&gt;</code></p>')
+        self.assertEqual(node.to_html(minify=True), node.to_html())
+
+    def test_attributes_are_escaped(self):
+        leaf = LeafNode("a", "x", {"href": '/search?q="a"&b=<c>'})
+        self.assertEqual(leaf.to_html(), '<a href="/search?q=&quot;a&quot;&amp;b=&lt;c&gt;">x</a>')
+        img = LeafNode("img", "", {"src": "a.png", "alt": 'say "hi"'})
+        self.assertEqual(img.to_html(), '<img src="a.png" alt="say &quot;hi&quot;" />')
+
+    def test_escape_returns_plain_strings_unchanged(self):
+        text = "".join(["no special ", "characters"])
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+        self.assertEqual(escape_text("&amp;"), "&amp;amp;")
+
+    def test_raw_nodes_are_not_escaped(self):
+        node = ParentNode("div", [RawNode("<p>a &amp; b</p>")])
+        self.assertEqual(node.to_html(), "<div><p>a &amp; b</p></div>")
+
 if __name__ == "__main__":
     unittest.main()
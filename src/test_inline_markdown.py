@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from textnode import TextNode, TextType
 from inline_markdown import (
@@ -7,6 +8,9 @@ from inline_markdown import (
     extract_markdown_links,
     extract_markdown_images,
     text_to_textnodes,
+    find_bracket_spans,
+    find_link_spans,
+    MarkdownSyntaxError,
 )
 
 class TestInlineMarkdown(unittest.TestCase):
@@ -151,6 +155,31 @@ class TestInlineMarkdown(unittest.TestCase):
             new_nodes,
         )
 
+    def test_chained_splits_share_the_source(self):
+        text = "Some `code` and **bold** with ![image](/a.png) and a [link](/b) `unclosed"
+        nodes = [TextNode(text, TextType.TEXT)]
+        nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+        nodes = split_nodes_image(nodes)
+        nodes = split_nodes_link(nodes)
+        self.assertTrue(all(node.source is text for node in nodes))
+        self.assertEqual(
+            nodes[3:],
+            [
+                TextNode("image", TextType.IMAGE, "/a.png"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "/b"),
+                TextNode(" `unclosed", TextType.TEXT),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            split_nodes_delimiter(nodes, "`", TextType.CODE)
+
+    def test_split_error_positions_are_relative_to_the_node(self):
+        nodes = split_nodes_delimiter([TextNode("**a**\nb [c", TextType.TEXT)], "**", TextType.BOLD)
+        with self.assertRaises(MarkdownSyntaxError) as error:
+            split_nodes_link(nodes)
+        self.assertEqual((error.exception.line, error.exception.column), (2, 3))
+
 class TestMarkdownImagesExtraction(unittest.TestCase):
     def test_no_images(self):
         """Test with text containing no markdown images."""
@@ -390,6 +419,52 @@ class TestTextToTextNodes(unittest.TestCase):
         nodes = text_to_textnodes(text)
         self.assertEqual(len(nodes), 0)
 
+    def test_delimiters_inside_code_are_literal(self):
+        nodes = text_to_textnodes("Use `a_b **c** [x](y)` here")
+        self.assertListEqual(
+            [
+                TextNode("Use ", TextType.TEXT),
+                TextNode("a_b **c** [x](y)", TextType.CODE),
+                TextNode(" here", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_italic_content_is_not_parsed_further(self):
+        nodes = text_to_textnodes("_a **b** [c](d)_ and **e**")
+        self.assertListEqual(
+            [
+                TextNode("a **b** [c](d)", TextType.ITALIC),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("e", TextType.BOLD),
+            ],
+            nodes,
+        )
+
+    def test_empty_sections_are_dropped(self):
+        nodes = text_to_textnodes("a****b``c")
+        self.assertListEqual(
+            [TextNode("a", TextType.TEXT), TextNode("b", TextType.TEXT), TextNode("c", TextType.TEXT)],
+            nodes,
+        )
+
+    def test_spans_cannot_cross_earlier_delimiters(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("_a `b` c_")
+        with self.assertRaises(ValueError):
+            text_to_textnodes("**a _b_ c**")
+
+    def test_links_and_images_between_spans(self):
+        nodes = text_to_textnodes("![i](u)**b**[l](v)")
+        self.assertListEqual(
+            [
+                TextNode("i", TextType.IMAGE, "u"),
+                TextNode("b", TextType.BOLD),
+                TextNode("l", TextType.LINK, "v"),
+            ],
+            nodes,
+        )
+
     def test_invalid_markdown(self):
         # Test unclosed code section
         with self.assertRaises(ValueError):
@@ -410,3 +485,56 @@ class TestTextToTextNodes(unittest.TestCase):
         # Test invalid image
         with self.assertRaises(ValueError):
             text_to_textnodes("This is ![unclosed](image")
+
+    def test_syntax_error_position(self):
+        with self.assertRaises(MarkdownSyntaxError) as cm:
+            text_to_textnodes("This is ![unclosed](image")
+        self.assertEqual((cm.exception.line, cm.exception.column), (1, 9))
+        self.assertIn("line 1, column 9", str(cm.exception))
+
+        with self.assertRaises(MarkdownSyntaxError) as cm:
+            text_to_textnodes("[ok](a) fine\nthen **bold")
+        self.assertEqual((cm.exception.line, cm.exception.column), (2, 6))
+
+        with self.assertRaises(MarkdownSyntaxError) as cm:
+            text_to_textnodes("![a](b) and [c](d) [open](url")
+        self.assertEqual(cm.exception.column, 20)
+
+    def test_syntax_error_position_in_source(self):
+        # The text joins two source lines: from offset 4 on it is line 8
+        # from column 3.
+        origin = [(0, 7, 1), (4, 8, 3)]
+        with self.assertRaises(MarkdownSyntaxError) as cm:
+            text_to_textnodes("abc x **y", origin)
+        self.assertEqual((cm.exception.line, cm.exception.column), (8, 5))
+        with self.assertRaises(MarkdownSyntaxError) as cm:
+            text_to_textnodes("a [b c", origin)
+        self.assertEqual((cm.exception.line, cm.exception.column), (7, 3))
+
+    def test_unclosed_found_by_the_span_walk(self):
+        self.assertEqual(find_bracket_spans("![a](b) ![c](d", "!["), ([(0, 3, 7)], 8))
+        self.assertEqual(find_link_spans("[a](b) [c"), ([(0, 2, 6)], 7))
+        self.assertEqual(find_link_spans("![a](b) [c](d)"), ([(8, 10, 14)], -1))
+        # A "[" inside the URL of a bracket span is not checked, even when
+        # that span is not a link.
+        self.assertEqual(find_link_spans("[x](a(b[c) d"), ([], -1))
+        self.assertEqual(find_link_spans("[x](a(b[c) [d"), ([], 11))
+
+    def test_text_after_a_span_is_not_joined_to_text_before_it(self):
+        self.assertEqual(
+            text_to_textnodes("[a][b](c)("),
+            [TextNode("[a]", TextType.TEXT), TextNode("b", TextType.LINK, "c"), TextNode("(", TextType.TEXT)],
+        )
+
+    def test_syntax_error_pickles(self):
+        error = pickle.loads(pickle.dumps(MarkdownSyntaxError("bad", 3, 4)))
+        self.assertEqual((error.line, error.column), (3, 4))
+        self.assertEqual(str(error), "bad at line 3, column 4")
+
+    def test_unclosed_brackets_scan_linearly(self):
+        # These used to backtrack quadratically in the regexes.
+        for text in ("![" * 50000, "[" * 100000, "![a](" * 20000):
+            with self.assertRaises(MarkdownSyntaxError):
+                text_to_textnodes(text)
+        nodes = text_to_textnodes("[a](b) " * 20000)
+        self.assertEqual(len(nodes), 40000)
@@ -0,0 +1,86 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_incremental
+from manifest import load_manifest, new_manifest, prune_output, save_manifest
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+class TestManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello")
+
+    def build(self, manifest, basepath="/"):
+        generate_pages_incremental(self.content, self.template, self.docs, basepath, manifest)
+
+    def test_save_and_load_roundtrip(self):
+        path = os.path.join(self.root, ".cache", "manifest.json")
+        manifest = new_manifest()
+        manifest["pages"]["docs/index.html"] = {"source_hash": "abc"}
+        save_manifest(path, manifest)
+        self.assertEqual(load_manifest(path), manifest)
+
+    def test_load_missing_or_corrupt(self):
+        path = os.path.join(self.root, "manifest.json")
+        self.assertEqual(load_manifest(path), new_manifest())
+        self.write(path, "{not json")
+        self.assertEqual(load_manifest(path), new_manifest())
+
+    def test_unchanged_pages_are_skipped(self):
+        manifest = new_manifest()
+        self.build(manifest)
+        post = os.path.join(self.docs, "blog", "post.html")
+        self.write(post, "stale")
+        self.build(manifest)
+        with open(post) as file:
+            self.assertEqual(file.read(), "stale")
+
+    def test_changed_inputs_rerender(self):
+        manifest = new_manifest()
+        self.build(manifest)
+        post = os.path.join(self.docs, "blog", "post.html")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nEdited")
+        self.build(manifest)
+        with open(post) as file:
+            self.assertIn("Edited", file.read())
+        self.write(post, "stale")
+        self.build(manifest, basepath="/public/")
+        with open(post) as file:
+            self.assertIn("<p>Edited</p>", file.read())
+
+    def test_renderer_change_rerenders(self):
+        manifest = new_manifest()
+        self.build(manifest)
+        post = os.path.join(self.docs, "blog", "post.html")
+        self.write(post, "stale")
+        for entry in manifest["pages"].values():
+            entry["renderer"] -= 1
+        self.build(manifest)
+        self.assertIn("<p>Hello</p>", self.read(post))
+
+    def test_removed_sources_are_pruned(self):
+        manifest = new_manifest()
+        self.build(manifest)
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build(manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_prune_output_keeps_root(self):
+        path = os.path.join(self.docs, "a", "b.html")
+        os.makedirs(os.path.dirname(path))
+        self.write(path, "x")
+        prune_output(path, self.docs)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "a")))
+        self.assertTrue(os.path.isdir(self.docs))
+
+if __name__ == "__main__":
+    unittest.main()
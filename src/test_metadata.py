@@ -0,0 +1,71 @@
+import io
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from manifest import new_manifest
+from metadata import list_pages, page_url, prune_listings, read_front_matter, read_header, read_metadata, write_listings
+
+class TestFrontMatter(unittest.TestCase):
+    def test_fields(self):
+        file = io.StringIO("---\ntitle: Hello\ndate: \"2024-01-02\"\n\ntags: a, b\n---\n# Heading\n")
+        self.assertEqual(read_front_matter(file), {"title": "Hello", "date": "2024-01-02", "tags": "a, b"})
+        self.assertEqual(file.read(), "# Heading\n")
+
+    def test_no_front_matter(self):
+        for text in ["# Title\n", "---\nnot a field\n---\n", "---\ntitle: unclosed\n"]:
+            file = io.StringIO(text)
+            self.assertEqual(read_front_matter(file), {})
+            self.assertEqual(file.read(), text)
+
+    def test_header_title(self):
+        file = io.StringIO("---\ndate: 2024\n---\nintro\n# Heading\n\nbody\n")
+        self.assertEqual(read_header(file), {"date": "2024", "title": "Heading"})
+        self.assertEqual(file.read(), "intro\n# Heading\n\nbody\n")
+        self.assertEqual(read_header(io.StringIO("---\ntitle: Front\n---\n# Heading\n"))["title"], "Front")
+        with self.assertRaises(ValueError):
+            read_header(io.StringIO("no title"))
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("blog", "tom", "index.md")), "/blog/tom")
+        self.assertEqual(page_url("index.md"), "/")
+        self.assertEqual(page_url(os.path.join("blog", "post.md")), "/blog/post.html")
+
+class TestListPages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.root
+        for name, text in [
+            ("index.md", "# Home"),
+            ("blog/index.md", "# Blog"),
+            ("blog/old/index.md", "---\ndate: 2020-01-01\n---\n# Old"),
+            ("blog/new/index.md", "---\ndate: 2024-01-01\n---\n# New"),
+            ("blog/undated.md", "# Undated\n\n" + "[unclosed" * 10),
+        ]:
+            self.write(os.path.join(self.content, name), text)
+
+    def test_section_listing(self):
+        # The body of undated.md would fail to render, but it is never parsed.
+        pages = list_pages(self.content, "blog", "/public/")
+        self.assertEqual([page["title"] for page in pages], ["New", "Old", "Undated"])
+        self.assertEqual(
+            [page["url"] for page in pages],
+            ["/public/blog/new", "/public/blog/old", "/public/blog/undated.html"],
+        )
+        self.assertEqual(pages[0]["date"], "2024-01-01")
+
+    def test_unlisted_sections_are_pruned(self):
+        docs = os.path.join(self.root, "docs")
+        manifest = new_manifest()
+        prune_listings(docs, manifest, write_listings(self.content, docs, ["", "blog"]))
+        self.assertTrue(os.path.exists(os.path.join(docs, "blog", "pages.json")))
+        prune_listings(docs, manifest, write_listings(self.content, docs, [""]))
+        self.assertFalse(os.path.exists(os.path.join(docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(docs, "pages.json")))
+        self.assertEqual(manifest["listings"], [os.path.join(docs, "pages.json")])
+
+    def test_read_metadata(self):
+        self.assertEqual(read_metadata(os.path.join(self.content, "index.md")), {"title": "Home"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from output import OutputWriter, make_dirs
+
+class TestOutputWriter(TempDirTestCase):
+    def test_make_dirs(self):
+        paths = [os.path.join(self.root, "a", "b", "x.html"), os.path.join(self.root, "a", "y.html")]
+        make_dirs(paths)
+        self.assertTrue(os.path.isdir(os.path.join(self.root, "a", "b")))
+
+    def test_writes_everything_before_close_returns(self):
+        paths = [os.path.join(self.root, f"{i}.html") for i in range(50)]
+        with OutputWriter(workers=2, queue_size=3) as writer:
+            for i, path in enumerate(paths):
+                writer.write(path, f"page {i}")
+        for i, path in enumerate(paths):
+            self.assertEqual(self.read(path), f"page {i}")
+
+    def test_errors_are_collected(self):
+        missing = os.path.join(self.root, "missing", "x.html")
+        ok = os.path.join(self.root, "ok.html")
+        writer = OutputWriter(workers=2)
+        writer.write(missing, "x")
+        writer.write(ok, "ok")
+        errors = writer.close()
+        self.assertEqual([path for path, _ in errors], [missing])
+        self.assertIn("FileNotFoundError", errors[0][1])
+        self.assertEqual(self.read(ok), "ok")
+        self.assertEqual(writer.close(), [])
+
+    def test_inline_writer_raises(self):
+        writer = OutputWriter(workers=0)
+        with self.assertRaises(FileNotFoundError):
+            writer.write(os.path.join(self.root, "missing", "x.html"), "x")
+        path = os.path.join(self.root, "x.html")
+        writer.write(path, "x")
+        self.assertEqual(self.read(path), "x")
+
+    def test_chunks_are_streamed_inline_and_joined_for_the_pool(self):
+        written = []
+        def chunks():
+            for chunk in ["<p>", "x", "</p>"]:
+                # Streaming means the file is already open while producing.
+                written.append(os.path.exists(path))
+                yield chunk
+        path = os.path.join(self.root, "inline.html")
+        OutputWriter(workers=0).write(path, chunks())
+        self.assertEqual(self.read(path), "<p>x</p>")
+        self.assertEqual(written, [True, True, True])
+        pooled = os.path.join(self.root, "pooled.html")
+        with OutputWriter(workers=2) as writer:
+            writer.write(pooled, iter(["<p>", "y", "</p>"]))
+        self.assertEqual(self.read(pooled), "<p>y</p>")
+
+if __name__ == "__main__":
+    unittest.main()
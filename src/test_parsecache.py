@@ -0,0 +1,81 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from gencontent import render_page
+from manifest import hash_file
+from parsecache import ParseCache
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = ParseCache(os.path.join(self.root, "parse"))
+
+    def test_round_trip(self):
+        key = self.cache.key("abc")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "Title", "<div></div>")
+        self.assertEqual(self.cache.get(key), ("Title", "<div></div>"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_entries_stream_in_and_out(self):
+        key = self.cache.key("abc")
+        chunks = self.cache.iter_put(key, "Multi\nline", iter(["<p>", "a", "</p>"]))
+        self.assertEqual(next(chunks), "<p>")
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(list(chunks), ["a", "</p>"])
+        title, chunks = self.cache.open_entry(key)
+        self.assertEqual((title, "".join(chunks)), ("Multi\nline", "<p>a</p>"))
+
+    def test_abandoned_put_stores_nothing(self):
+        key = self.cache.key("abc")
+        chunks = self.cache.iter_put(key, "Title", iter(["<p>", "a", "</p>"]))
+        next(chunks)
+        chunks.close()
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(os.listdir(os.path.dirname(self.cache.entry_path(key))), [])
+
+    def test_key_covers_render_options(self):
+        keys = {
+            self.cache.key("abc"),
+            self.cache.key("abd"),
+            self.cache.key("abc", "/public/"),
+            self.cache.key("abc", minify=True),
+        }
+        self.assertEqual(len(keys), 4)
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key("abc")
+        self.cache.put(key, "Title", "html")
+        with open(self.cache.entry_path(key), "w") as file:
+            file.write("{")
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(os.path.exists(self.cache.entry_path(key)))
+
+    def test_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "t", "x" * 100)
+            os.utime(self.cache.entry_path(key), ns=(i * 10**9, i * 10**9))
+        size = os.path.getsize(self.cache.entry_path(keys[0]))
+        self.cache.get(keys[0])
+        self.cache.max_bytes = 2 * size
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_render_page_reuses_cached_body(self):
+        from_path = os.path.join(self.root, "index.md")
+        template_path = os.path.join(self.root, "template.html")
+        self.write(from_path, "# Title\n\nbody")
+        self.write(template_path, "<title>{{ Title }}</title>{{ Content }}")
+        page = render_page(from_path, template_path, "/", parse_cache=self.cache)
+        self.assertEqual(page, "<title>Title</title><div><h1>Title</h1><p>body</p></div>")
+        # A second render takes the body from the cache instead of parsing.
+        self.cache.put(self.cache.key(hash_file(from_path)), "Cached", "<p>cached</p>")
+        page = render_page(from_path, template_path, "/", parse_cache=self.cache)
+        self.assertEqual(page, "<title>Cached</title><p>cached</p>")
+
+if __name__ == "__main__":
+    unittest.main()
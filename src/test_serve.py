@@ -0,0 +1,91 @@
+import os
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from fixtures import TempDirTestCase
+from serve import PreviewSite, make_server
+
+class TestPreviewSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "contact.md"), "# Contact")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "---\ndate: 2024-01-01\n---\n# Post")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, ".index.css.swp"), "swap")
+        self.site = PreviewSite(self.content, self.static, self.template, "/", listings=["blog"])
+
+    def test_resolve(self):
+        page = lambda *parts: ("page", os.path.join(self.content, *parts))
+        self.assertEqual(self.site.resolve("/"), page("index.md"))
+        self.assertEqual(self.site.resolve("/index.html"), page("index.md"))
+        self.assertEqual(self.site.resolve("/contact.html?x=1"), page("contact.md"))
+        self.assertEqual(self.site.resolve("/blog/post"), page("blog", "post", "index.md"))
+        self.assertEqual(self.site.resolve("/blog/post/"), page("blog", "post", "index.md"))
+        self.assertEqual(self.site.resolve("/index.css"), ("static", os.path.join(self.static, "index.css")))
+        self.assertEqual(self.site.resolve("/blog/pages.json"), ("listing", "blog"))
+        self.assertIsNone(self.site.resolve("/contact"))
+        self.assertIsNone(self.site.resolve("/.index.css.swp"))
+        self.assertIsNone(self.site.resolve("/../template.html"))
+        self.assertIsNone(self.site.resolve("/%2e%2e/template.html"))
+
+    def test_resolve_basepath(self):
+        site = PreviewSite(self.content, self.static, self.template, "/site/")
+        self.assertEqual(site.resolve("/site"), ("page", os.path.join(self.content, "index.md")))
+        self.assertEqual(site.resolve("/site/index.css"), ("static", os.path.join(self.static, "index.css")))
+        self.assertIsNone(site.resolve("/index.css"))
+        status, _, body = site.get("/site/")
+        self.assertEqual(status, 200)
+        self.assertIn(b'href="/site/index.css"', body)
+
+    def test_pages_are_cached_until_sources_change(self):
+        self.assertEqual(self.site.get("/")[2], b'<title>Home</title><link href="/index.css"><div><h1>Home</h1></div>')
+        self.assertEqual(self.site.get("/")[2], b'<title>Home</title><link href="/index.css"><div><h1>Home</h1></div>')
+        self.assertEqual((self.site.pages.hits, self.site.pages.misses), (1, 1))
+
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nEdited")
+        self.assertIn(b"<p>Edited</p>", self.site.get("/")[2])
+        self.write(os.path.join(self.content, "template.html"), "<main>{{ Content }}</main>")
+        self.assertEqual(self.site.get("/")[2], b"<main><div><h1>Home</h1><p>Edited</p></div></main>")
+
+    def test_static_and_listing(self):
+        self.assertEqual(self.site.get("/index.css"), (200, "text/css", b"body {}"))
+        status, content_type, body = self.site.get("/blog/pages.json")
+        self.assertEqual((status, content_type), (200, "application/json"))
+        self.assertIn(b'"url": "/blog/post"', body)
+        self.assertEqual(self.site.get("/missing.html")[0], 404)
+
+class TestServer(TempDirTestCase):
+    def test_serves_pages_and_errors(self):
+        content = os.path.join(self.root, "content")
+        template = os.path.join(self.root, "template.html")
+        self.write(template, "{{ Content }}")
+        self.write(os.path.join(content, "index.md"), "# Home")
+        self.write(os.path.join(content, "broken.md"), "no title")
+        server = make_server(PreviewSite(content, os.path.join(self.root, "static"), template, "/"), port=0)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = f"http://localhost:{server.server_address[1]}"
+            with urllib.request.urlopen(url + "/") as response:
+                self.assertEqual(response.headers["Content-Type"], "text/html; charset=utf-8")
+                self.assertEqual(response.read(), b"<div><h1>Home</h1></div>")
+            for path, status in (("/missing", 404), ("/broken.html", 500)):
+                with self.assertRaises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(url + path)
+                self.assertEqual(error.exception.code, status)
+                error.exception.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs")))
+
+if __name__ == "__main__":
+    unittest.main()
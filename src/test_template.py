@@ -0,0 +1,92 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from gencontent import find_pages
+from template import Template, load_template, minify_markup, rebase_urls
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>x</p>"),
+            "<title>Hi</title><body><p>x</p></body>",
+        )
+
+    def test_compile_splits_once(self):
+        template = Template("a{{ Content }}b{{ Title }}c{{ Content }}")
+        self.assertEqual(template.parts, ["a", "", "b", "", "c", "", ""])
+        self.assertEqual(template.slots, [(1, "Content"), (3, "Title"), (5, "Content")])
+
+    def test_slot_values_are_not_rescanned(self):
+        template = Template("{{ Title }}|{{ Content }}")
+        self.assertEqual(template.render(Title="{{ Content }}", Content="c"), "{{ Content }}|c")
+
+    def test_iter_render_passes_chunks_through(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}!")
+        chunks = list(template.iter_render(Title="T", Content=iter(["<p>", "x", "</p>"])))
+        self.assertEqual(chunks, ["<title>", "T", "</title>", "<p>", "x", "</p>", "!"])
+
+    def test_missing_slot_renders_empty(self):
+        template = Template("<p>{{ Content }}</p>")
+        self.assertEqual(template.render(), "<p></p>")
+
+    def test_basepath_applied_at_compile(self):
+        template = Template('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/public/")
+        self.assertEqual(
+            template.render(Content=""),
+            '<link href="/public/index.css" /><img src="/public/a.png" />',
+        )
+
+    def test_minify_at_compile(self):
+        source = (
+            "<!doctype html>\n<html>\n  <head>\n    <title>{{ Title }}</title>\n  </head>\n"
+            "  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n"
+        )
+        template = Template(source, minify=True)
+        self.assertEqual(
+            template.render(Title="T", Content="<p>x</p>"),
+            "<!doctype html><html><head><title>T</title></head><body><article><p>x</p></article></body></html>",
+        )
+
+    def test_minify_markup(self):
+        self.assertEqual(
+            minify_markup("<p>\n  a  <b>b</b>\n  <i>c</i>\n</p>\n<!-- note -->\n<!--[if IE]>ie<![endif]-->"),
+            "<p>a <b>b</b> <i>c</i></p><!--[if IE]>ie<![endif]-->",
+        )
+        raw = "<pre>\n  keep  </pre><script>\nif (a < b) {}\n</script><textarea> x  </textarea>"
+        self.assertEqual(minify_markup("  " + raw + "\n"), raw)
+
+    def test_rebase_urls_default_basepath(self):
+        html = '<a href="/x">x</a>'
+        self.assertIs(rebase_urls(html, "/"), html)
+
+class TestLoadTemplate(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_cached_until_changed(self):
+        path = os.path.join(self.root, "template.html")
+        self.write(path, "<p>{{ Content }}</p>")
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+        self.assertIsNot(load_template(path, "/public/"), first)
+        self.write(path, "<div>{{ Content }}</div>")
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(load_template(path).render(Content="x"), "<div>x</div>")
+
+    def test_per_directory_template(self):
+        content = os.path.join(self.root, "content")
+        default = os.path.join(self.root, "template.html")
+        self.write(default, "{{ Content }}")
+        self.write(os.path.join(content, "index.md"), "# Home")
+        self.write(os.path.join(content, "blog", "template.html"), "<article>{{ Content }}</article>")
+        self.write(os.path.join(content, "blog", "2024", "post.md"), "# Post")
+        pages = find_pages(content, os.path.join(self.root, "docs"), default)
+        templates = {os.path.basename(from_path): template for from_path, template, _ in pages}
+        self.assertEqual(templates["index.md"], default)
+        self.assertEqual(templates["post.md"], os.path.join(content, "blog", "template.html"))
+        self.assertEqual(len(pages), 2)
+
+if __name__ == "__main__":
+    unittest.main()
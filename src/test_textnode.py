@@ -33,6 +33,23 @@ class TestTextNode(unittest.TestCase):
             "TextNode(text='This is a text node', text_type=text, url=https://www.boot.dev)", repr(node)
         )
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_span(self):
+        source = "This is **bold** text"
+        node = TextNode.span(source, 10, 14, TextType.BOLD)
+        self.assertIs(node.source, source)
+        self.assertEqual(node.text, "bold")
+        self.assertEqual(node, TextNode("bold", TextType.BOLD))
+        self.assertEqual(repr(node), "TextNode(text='bold', text_type=bold, url=None)")
+
+    def test_set_text(self):
+        node = TextNode.span("This is **bold** text", 10, 14, TextType.BOLD)
+        node.text = "new"
+        self.assertEqual((node.text, node.start, node.end), ("new", 0, 3))
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
@@ -72,5 +89,13 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.props["src"], "https://www.boot.dev")
         self.assertEqual(html_node.props["alt"], "This is a text node")
 
+    def test_basepath(self):
+        link = text_node_to_html_node(TextNode("home", TextType.LINK, "/blog/"), "/public/")
+        self.assertEqual(link.props["href"], "/public/blog/")
+        image = text_node_to_html_node(TextNode("logo", TextType.IMAGE, "/images/a.png"), "/public/")
+        self.assertEqual(image.props["src"], "/public/images/a.png")
+        external = text_node_to_html_node(TextNode("boot", TextType.LINK, "https://www.boot.dev"), "/public/")
+        self.assertEqual(external.props["href"], "https://www.boot.dev")
+
 if __name__ == "__main__":
     unittest.main()
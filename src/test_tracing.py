@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import tracing
+from blockcache import block_cache
+from gencontent import generate_page
+from output import OutputWriter
+from parsecache import ParseCache
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        tracing.disable()
+
+    def test_spans_are_noops_when_disabled(self):
+        self.assertFalse(tracing.is_enabled())
+        with tracing.span("read"):
+            pass
+        self.assertEqual(tracing.disable(), [])
+
+    def test_span_records_event(self):
+        tracing.enable()
+        with tracing.span("read", path="a.md"):
+            pass
+        events = tracing.disable()
+        self.assertEqual(len(events), 1)
+        event = events[0]
+        self.assertEqual(event["name"], "read")
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"], {"path": "a.md"})
+        self.assertGreaterEqual(event["dur"], 0)
+
+    def test_summarize(self):
+        event = lambda name, cat, ts, dur, **args: {
+            "name": name, "cat": cat, "ts": ts, "dur": dur, "pid": 1, "tid": 1, "args": args
+        }
+        events = [
+            event("page", "page", 0, 3000, path="slow.md"),
+            event("page", "page", 3000, 1000, path="fast.md"),
+            event("serialize", "stage", 0, 500),
+            event("serialize", "stage", 3000, 700),
+            # A read inside a block parse counts toward reading only.
+            event("block parse", "stage", 600, 400),
+            event("read", "stage", 700, 300),
+        ]
+        lines = tracing.summarize(events, top=1)
+        self.assertIn("slow.md", lines[1])
+        self.assertNotIn("fast.md", "\n".join(lines))
+        self.assertIn("1.20 ms  serialize", "\n".join(lines))
+        self.assertIn("0.10 ms  block parse", "\n".join(lines))
+        self.assertIn("0.30 ms  read", "\n".join(lines))
+
+    def test_traced_page_matches_untraced(self):
+        with tempfile.TemporaryDirectory() as root:
+            from_path = os.path.join(root, "index.md")
+            template_path = os.path.join(root, "template.html")
+            with open(from_path, "w") as file:
+                file.write("# Title\n\nSome **bold** [link](/x)\n\n- a\n- b\n")
+            with open(template_path, "w") as file:
+                file.write('<title>{{ Title }}</title><a href="/">{{ Content }}</a>')
+            plain_path = os.path.join(root, "plain.html")
+            traced_path = os.path.join(root, "traced.html")
+            parse_cache = ParseCache(os.path.join(root, "parse"))
+            block_cache.clear()
+            generate_page(from_path, template_path, plain_path, "/public/")
+            block_cache.clear()
+            tracing.enable()
+            generate_page(from_path, template_path, traced_path, "/public/", parse_cache=parse_cache)
+            events = tracing.disable()
+            with open(plain_path) as plain, open(traced_path) as traced:
+                self.assertEqual(plain.read(), traced.read())
+            # The traced build runs through the same caches as any other.
+            names = [event["name"] for event in events]
+            for stage in [
+                "template", "parse cache", "read header", "read", "block parse", "block cache", "inline parse",
+                "html build",
+                "serialize", "page",
+            ]:
+                self.assertIn(stage, names)
+            self.assertEqual(names.count("block cache"), 3)
+            trace_path = os.path.join(root, "trace.json")
+            tracing.write_trace(trace_path, events)
+            with open(trace_path) as file:
+                self.assertEqual(len(json.load(file)["traceEvents"]), len(events))
+
+            tracing.enable()
+            generate_page(from_path, template_path, traced_path, "/public/", parse_cache=parse_cache)
+            names = [event["name"] for event in tracing.disable()]
+            self.assertIn("parse cache", names)
+            self.assertNotIn("read header", names)
+
+    def test_pooled_writes_are_traced_on_their_thread(self):
+        with tempfile.TemporaryDirectory() as root:
+            tracing.enable()
+            with OutputWriter() as writer:
+                writer.write(os.path.join(root, "a.html"), ["<p>", "a", "</p>"])
+            events = tracing.disable()
+        self.assertEqual([event["name"] for event in events], ["write"])
+        self.assertNotEqual(events[0]["tid"], threading.get_native_id())
+        self.assertEqual(events[0]["args"], {"path": os.path.join(root, "a.html")})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import unittest
+
+import walker
+from fixtures import TempDirTestCase
+from walker import walk
+
+class TestWalk(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ["b.md", "a/z.md", "a/b/c.md", "c.md", ".DS_Store", "a/.c.md.swp", "a/z.md~"]:
+            self.write(os.path.join(self.root, name), name)
+
+    def tearDown(self):
+        walker.set_ignore_patterns(walker.DEFAULT_IGNORE)
+        super().tearDown()
+
+    def rel_paths(self, **kwargs):
+        return [rel_path.replace(os.sep, "/") for rel_path, _ in walk(self.root, **kwargs)]
+
+    def test_files_in_name_order_depth_first(self):
+        self.assertEqual(self.rel_paths(), ["a/b/c.md", "a/z.md", "b.md", "c.md"])
+
+    def test_directories_before_their_contents(self):
+        self.assertEqual(self.rel_paths(dirs=True), ["a", "a/b", "a/b/c.md", "a/z.md", "b.md", "c.md"])
+
+    def test_ignore_patterns(self):
+        self.assertEqual(len(self.rel_paths(ignore=())), 7)
+        self.assertEqual(self.rel_paths(ignore=["a"]), [".DS_Store", "b.md", "c.md"])
+        walker.set_ignore_patterns(walker.DEFAULT_IGNORE + ("c.md",))
+        self.assertEqual(self.rel_paths(), ["a/z.md", "b.md"])
+
+    def test_missing_root(self):
+        self.assertEqual(list(walk(os.path.join(self.root, "missing"))), [])
+
+    def test_entries_carry_paths(self):
+        for rel_path, entry in walk(self.root):
+            self.assertEqual(entry.path, os.path.join(self.root, rel_path))
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "needs symlinks")
+    def test_symlinks(self):
+        os.symlink(os.path.join(self.root, "a", "b"), os.path.join(self.root, "linked"))
+        os.symlink(self.root, os.path.join(self.root, "a", "b", "loop"))
+        os.symlink(os.path.join(self.root, "missing"), os.path.join(self.root, "broken"))
+        self.assertEqual(
+            self.rel_paths(),
+            ["a/b/c.md", "a/z.md", "b.md", "c.md", "linked/c.md"],
+        )
+        self.assertEqual(self.rel_paths(follow_symlinks=False), ["a/b/c.md", "a/z.md", "b.md", "c.md"])
+
+    def test_deep_tree(self):
+        path = self.root
+        for _ in range(300):
+            path = os.path.join(path, "d")
+        os.makedirs(path)
+        with open(os.path.join(path, "deep.md"), "w") as file:
+            file.write("deep")
+        self.assertIn("/".join(["d"] * 300 + ["deep.md"]), self.rel_paths())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import unittest
+from unittest import mock
+
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_incremental
+from manifest import new_manifest
+from watch import Watcher, diff
+
+class TestDiff(unittest.TestCase):
+    def test_diff(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(diff(old, new), (["b", "d"], ["c"]))
+
+class TestWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.manifest = new_manifest()
+        generate_pages_incremental(self.content, self.template, self.docs, "/", self.manifest)
+        self.watcher = Watcher(
+            self.content, self.static, self.template, self.docs, "/", self.manifest,
+            os.path.join(self.root, ".cache", "manifest.json"),
+        )
+
+    def test_no_changes(self):
+        self.assertFalse(self.watcher.poll())
+
+    def test_changed_page_is_rerendered_alone(self):
+        home = os.path.join(self.docs, "index.html")
+        post = os.path.join(self.docs, "blog", "post.html")
+        self.write(home, "untouched")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nEdited")
+        self.assertTrue(self.watcher.poll())
+        self.assertIn("<p>Edited</p>", self.read(post))
+        self.assertEqual(self.read(home), "untouched")
+
+    def test_removed_page(self):
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.assertTrue(self.watcher.poll())
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+        self.assertNotIn(os.path.join(self.docs, "blog", "post.html"), self.manifest["pages"])
+
+    def test_template_change_rerenders_everything(self):
+        self.write(self.template, "<article>{{ Content }}</article>")
+        self.assertTrue(self.watcher.poll())
+        self.assertTrue(self.read(os.path.join(self.docs, "index.html")).startswith("<article>"))
+        self.assertTrue(self.read(os.path.join(self.docs, "blog", "post.html")).startswith("<article>"))
+
+    def test_static_changes(self):
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.read(os.path.join(self.docs, "images", "a.png")), "png")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.assertTrue(self.watcher.poll())
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+
+    def test_missing_template_waits_for_it(self):
+        # An editor saving by rename leaves the template missing for a moment.
+        moved = self.template + ".tmp"
+        os.rename(self.template, moved)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nEdited")
+        self.assertFalse(self.watcher.poll())
+        self.assertFalse(self.watcher.poll())
+        os.rename(moved, self.template)
+        self.assertTrue(self.watcher.poll())
+        self.assertIn("<p>Edited</p>", self.read(os.path.join(self.docs, "index.html")))
+
+    def test_static_file_deleted_during_copy(self):
+        path = os.path.join(self.static, "gone.css")
+        self.write(path, "x")
+        with mock.patch("watch.shutil.copy2", side_effect=FileNotFoundError(path)):
+            self.assertTrue(self.watcher.poll())
+        self.assertNotIn(os.path.join(self.docs, "gone.css"), self.manifest["static"])
+
+    def test_run_survives_a_failed_poll(self):
+        polls = [OSError("busy"), True, KeyboardInterrupt()]
+        with mock.patch.object(self.watcher, "poll", side_effect=polls) as poll, mock.patch("watch.time.sleep"):
+            self.watcher.run()
+        self.assertEqual(poll.call_count, 3)
+
+if __name__ == "__main__":
+    unittest.main()
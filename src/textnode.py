@@ -10,11 +10,37 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    # Nodes made by span() keep offsets into the string they were parsed
+    # from and slice their text out when it is read, so the splitting passes
+    # hand spans to each other without copying the text.
+    __slots__ = ("source", "start", "end", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
         self.url = url
 
+    @classmethod
+    def span(cls, source, start, end, text_type, url=None):
+        node = cls.__new__(cls)
+        node.source = source
+        node.start = start
+        node.end = end
+        node.text_type = text_type
+        node.url = url
+        return node
+
+    @property
+    def text(self):
+        # Slicing a whole string returns the string itself.
+        return self.source[self.start:self.end]
+
+    @text.setter
+    def text(self, text):
+        self.source = text
+        self.start = 0
+        self.end = len(text)
+
     def __eq__(self, other):
         if not isinstance(other, TextNode):
             return False
@@ -23,7 +49,16 @@ class TextNode:
     def __repr__(self):
         return f"TextNode(text='{self.text}', text_type={self.text_type.value}, url={self.url})"
 
-def text_node_to_html_node(text_node: TextNode):
+def rebase_url(url, basepath="/", assets=None):
+    # Fingerprinted assets are swapped for their hashed names, then
+    # site-absolute URLs are moved under the basepath the site is served from.
+    if assets is not None:
+        url = assets.get(url, url)
+    if basepath != "/" and url.startswith("/"):
+        return basepath + url[1:]
+    return url
+
+def text_node_to_html_node(text_node: TextNode, basepath="/", assets=None):
     match (text_node.text_type):
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -34,8 +69,8 @@ def text_node_to_html_node(text_node: TextNode):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            return LeafNode("a", text_node.text, {"href": rebase_url(text_node.url, basepath, assets)})
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            return LeafNode("img", "", {"src": rebase_url(text_node.url, basepath, assets), "alt": text_node.text})
         case _:
             raise ValueError(f"Unknown text type: {text_node.text_type}")
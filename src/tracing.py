@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Recorded events while tracing is enabled, None otherwise. Spans are cheap
+# no-ops when tracing is off.
+_events = None
+_disabled_span = nullcontext()
+
+def enable():
+    global _events
+    if _events is None:
+        _events = []
+
+def disable():
+    global _events
+    events = _events or []
+    _events = None
+    return events
+
+def is_enabled():
+    return _events is not None
+
+def add_events(events):
+    if _events is not None:
+        _events.extend(events)
+
+def span(name, cat="stage", **args):
+    if _events is None:
+        return _disabled_span
+    return _span(name, cat, args)
+
+@contextmanager
+def _span(name, cat, args):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _events.append({
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        })
+
+def write_trace(path, events):
+    # Chrome trace-event format, loadable in chrome://tracing or Perfetto.
+    with open(path, 'w') as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+def summarize(events, top=10):
+    lines = []
+    pages = sorted((event for event in events if event["cat"] == "page"), key=lambda event: -event["dur"])
+    if pages:
+        lines.append(f"Slowest pages ({len(pages)} rendered):")
+        for event in pages[:top]:
+            lines.append(f" {event['dur'] / 1000:10.2f} ms  {event['args'].get('path')}")
+    totals = {}
+    for event, self_time in stage_self_times(events):
+        totals[event["name"]] = totals.get(event["name"], 0) + self_time
+    if totals:
+        lines.append("Time per stage:")
+        for name, total in sorted(totals.items(), key=lambda item: -item[1]):
+            lines.append(f" {total / 1000:10.2f} ms  {name}")
+    return lines
+
+def stage_self_times(events):
+    # Stage spans can nest, such as a read inside the block parse that asked
+    # for more lines, so each stage is counted without the stages inside it.
+    stages = sorted(
+        (event for event in events if event["cat"] in ("stage", "static")),
+        key=lambda event: (event["pid"], event["tid"], event["ts"], -event["dur"]),
+    )
+    self_times = []
+    open_spans = []
+    for event in stages:
+        thread = (event["pid"], event["tid"])
+        while open_spans and (open_spans[-1][0] != thread or open_spans[-1][1] <= event["ts"]):
+            open_spans.pop()
+        if open_spans:
+            self_times[open_spans[-1][2]] -= event["dur"]
+        self_times.append(event["dur"])
+        open_spans.append((thread, event["ts"] + event["dur"], len(self_times) - 1))
+    return zip(stages, self_times)
@@ -0,0 +1,76 @@
+import fnmatch
+import os
+import re
+
+# Editor swap and backup files and OS metadata, which are never site content.
+DEFAULT_IGNORE = (".DS_Store", "Thumbs.db", "desktop.ini", ".*.swp", ".*.swo", "*~", ".#*", "#*#")
+
+_ignore_patterns = DEFAULT_IGNORE
+_ignore_re = None
+
+def set_ignore_patterns(patterns):
+    # Sets the name patterns every walk skips by default, for files and
+    # directories alike.
+    global _ignore_patterns, _ignore_re
+    _ignore_patterns = tuple(patterns)
+    _ignore_re = None
+
+def compile_ignore(patterns):
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+def _default_ignore_re():
+    global _ignore_re
+    if _ignore_re is None:
+        _ignore_re = compile_ignore(_ignore_patterns)
+    return _ignore_re
+
+def is_ignored(name):
+    ignore_re = _default_ignore_re()
+    return ignore_re is not None and ignore_re.match(name) is not None
+
+def _sorted_entries(dir_path, ignore_re):
+    with os.scandir(dir_path) as entries:
+        if ignore_re is None:
+            entries = list(entries)
+        else:
+            entries = [entry for entry in entries if not ignore_re.match(entry.name)]
+    entries.sort(key=lambda entry: entry.name)
+    return entries
+
+def walk(root, ignore=None, follow_symlinks=True, dirs=False):
+    # Yields (rel_path, entry) for every file below root, depth first in name
+    # order, and for every directory before its contents when dirs is set.
+    # The walk keeps an explicit stack, so deep trees do not hit the
+    # recursion limit, and only holds one sorted listing per level. Each
+    # os.DirEntry caches its stat, so callers that need one pay a single
+    # call. A symlinked directory that resolves to a directory already being
+    # walked is skipped, which breaks symlink loops.
+    ignore_re = _default_ignore_re() if ignore is None else compile_ignore(ignore)
+    if not os.path.isdir(root):
+        return
+    root_real = os.path.realpath(root)
+    stack = [(iter(_sorted_entries(root, ignore_re)), "", root_real)]
+    active = {root_real}
+    while stack:
+        entries, prefix, real_path = stack[-1]
+        for entry in entries:
+            rel_path = prefix + entry.name
+            if entry.is_dir(follow_symlinks=follow_symlinks):
+                if entry.is_symlink():
+                    child_real = os.path.realpath(entry.path)
+                    if child_real in active:
+                        continue
+                else:
+                    child_real = os.path.join(real_path, entry.name)
+                if dirs:
+                    yield rel_path, entry
+                stack.append((iter(_sorted_entries(entry.path, ignore_re)), rel_path + os.sep, child_real))
+                active.add(child_real)
+                break
+            if entry.is_file(follow_symlinks=follow_symlinks):
+                yield rel_path, entry
+        else:
+            stack.pop()
+            active.discard(real_path)
@@ -0,0 +1,170 @@
+import os
+import shutil
+import time
+
+from compress import compress_outputs
+from gencontent import find_page, generate_page, generate_pages_incremental, page_entry
+from manifest import prune_output, save_manifest
+from metadata import write_listings
+from template import TEMPLATE_FILENAME
+from walker import walk
+
+def scan(dir_path):
+    files = {}
+    for _, entry in walk(dir_path):
+        stat = entry.stat()
+        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+def scan_file(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    return {path: (stat.st_mtime_ns, stat.st_size)}
+
+def diff(old, new):
+    changed = sorted(path for path, stamp in new.items() if old.get(path) != stamp)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+class Watcher:
+    def __init__(
+        self,
+        dir_path_content,
+        dir_path_static,
+        template_path,
+        dest_dir_path,
+        BASEPATH,
+        manifest,
+        manifest_path,
+        compress=False,
+        minify=False,
+        listings=(),
+        parse_cache=None,
+    ):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.dest_dir_path = dest_dir_path
+        self.BASEPATH = BASEPATH
+        self.manifest = manifest
+        self.manifest_path = manifest_path
+        self.compress = compress
+        self.minify = minify
+        self.listings = listings
+        self.parse_cache = parse_cache
+        self.content = scan(dir_path_content)
+        self.static = scan(dir_path_static)
+        self.template = scan_file(template_path)
+        self.waiting = False
+
+    def poll(self):
+        template = scan_file(self.template_path)
+        if not template:
+            # Editors often save by writing a new file and renaming it over
+            # the old one, so the template can be missing for a moment. Leave
+            # every change pending until it is back.
+            if not self.waiting:
+                print(f"Waiting for {self.template_path} to come back...")
+                self.waiting = True
+            return False
+        self.waiting = False
+        content = scan(self.dir_path_content)
+        static = scan(self.dir_path_static)
+        content_changed, content_removed = diff(self.content, content)
+        static_changed, static_removed = diff(self.static, static)
+        template_changed, template_removed = diff(self.template, template)
+        self.content, self.static, self.template = content, static, template
+
+        templates_touched = template_changed or template_removed or any(
+            os.path.basename(path) == TEMPLATE_FILENAME for path in content_changed + content_removed
+        )
+        if not (content_changed or content_removed or static_changed or static_removed or templates_touched):
+            return False
+
+        start = time.perf_counter()
+        if templates_touched:
+            # The template hash is part of every page's manifest entry, so an
+            # incremental pass re-renders exactly the pages using it.
+            errors = generate_pages_incremental(
+                self.dir_path_content,
+                self.template_path,
+                self.dest_dir_path,
+                self.BASEPATH,
+                self.manifest,
+                minify=self.minify,
+                parse_cache=self.parse_cache,
+            )
+            for from_path, _, message in errors:
+                print(f" ! {from_path}: {message}")
+        else:
+            for path in content_changed:
+                if path.endswith(".md"):
+                    self.render(path)
+            for path in content_removed:
+                if path.endswith(".md"):
+                    self.remove_page(path)
+        for path in static_changed:
+            self.copy(path)
+        for path in static_removed:
+            self.remove_static(path)
+        if self.listings and (content_changed or content_removed):
+            write_listings(self.dir_path_content, self.dest_dir_path, self.listings, self.BASEPATH)
+        if self.compress:
+            compress_outputs(self.dest_dir_path, self.manifest)
+        save_manifest(self.manifest_path, self.manifest)
+        print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return True
+
+    def render(self, from_path):
+        from_path, template_path, dest_path = find_page(
+            from_path, self.dir_path_content, self.dest_dir_path, self.template_path
+        )
+        pages = self.manifest.setdefault("pages", {})
+        try:
+            generate_page(
+                from_path, template_path, dest_path, self.BASEPATH, minify=self.minify, parse_cache=self.parse_cache
+            )
+        except Exception as e:
+            pages.pop(dest_path, None)
+            print(f" ! {from_path}: {type(e).__name__}: {e}")
+            return
+        pages[dest_path] = page_entry(from_path, template_path, self.BASEPATH, minify=self.minify)
+
+    def remove_page(self, from_path):
+        _, _, dest_path = find_page(from_path, self.dir_path_content, self.dest_dir_path, self.template_path)
+        print(f" * removing {dest_path}")
+        prune_output(dest_path, self.dest_dir_path)
+        self.manifest.setdefault("pages", {}).pop(dest_path, None)
+
+    def copy(self, src_path):
+        dest_path = os.path.join(self.dest_dir_path, os.path.relpath(src_path, self.dir_path_static))
+        print(f" * {src_path} -> {dest_path}")
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        try:
+            shutil.copy2(src_path, dest_path)
+        except FileNotFoundError:
+            # Deleted since the scan; the next poll sees it as removed.
+            return
+        self.manifest.setdefault("static", {})[dest_path] = src_path
+
+    def remove_static(self, src_path):
+        dest_path = os.path.join(self.dest_dir_path, os.path.relpath(src_path, self.dir_path_static))
+        print(f" * removing {dest_path}")
+        prune_output(dest_path, self.dest_dir_path)
+        self.manifest.setdefault("static", {}).pop(dest_path, None)
+
+    def run(self, interval=0.2):
+        print("Watching for changes, press Ctrl-C to stop...")
+        try:
+            while True:
+                time.sleep(interval)
+                # A file can change again while a rebuild reads it, so one
+                # failed rebuild is reported and the next poll carries on.
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f" ! rebuild failed: {type(e).__name__}: {e}")
+        except KeyboardInterrupt:
+            print()